@@ -4,10 +4,39 @@ Provides retry and timeout logic for agent calls.
 """
 
 import time
-from typing import Tuple, Callable, Any
-from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+import asyncio
+import random
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Tuple, Callable, Any, Optional, MutableMapping, Dict
+from concurrent.futures import Future
+import diskcache
 import config
 
+try:
+    import blake3
+except ImportError:
+    blake3 = None
+
+log = logging.getLogger("pipeline")
+
+# Inputs above this size are hashed with BLAKE3's multithreaded mode
+_PARALLEL_HASH_THRESHOLD = 1 << 20
+
+# Cache keys are 128-bit digests: compact, and collisions are not a concern
+_KEY_BYTES = 16
+
+
+def _digest(data: bytes) -> str:
+    """Hex digest for cache keys: BLAKE3 when installed, BLAKE2b otherwise."""
+    if blake3 is None:
+        return hashlib.blake2b(data, digest_size=_KEY_BYTES).hexdigest()
+    if len(data) > _PARALLEL_HASH_THRESHOLD:
+        return blake3.blake3(data, max_threads=blake3.blake3.AUTO).hexdigest(length=_KEY_BYTES)
+    return blake3.blake3(data).hexdigest(length=_KEY_BYTES)
+
 
 class AgentTimeoutError(Exception):
     """Raised when an agent call times out."""
@@ -19,24 +48,147 @@ class AgentMaxRetriesError(Exception):
     pass
 
 
+class AgentPermanentError(AgentMaxRetriesError):
+    """Raised without retrying when the provider rejects a request outright."""
+    pass
+
+
+class AgentOutputError(ValueError):
+    """Raised by an agent when a completed response is unusable (not retried)."""
+    pass
+
+
+# HTTP statuses worth retrying besides 5xx; other 4xx fail the same way every time
+_RETRYABLE_STATUS = {408, 409, 429}
+
+
+def _retry_after(error: BaseException) -> Optional[float]:
+    """Return the Retry-After delay (seconds) carried by a provider error, if any."""
+    while error is not None:
+        response = getattr(error, "response", None)
+        headers = getattr(response, "headers", None)
+        if headers:
+            try:
+                return float(headers.get("retry-after"))
+            except (TypeError, ValueError):
+                pass
+        error = error.__cause__
+    return None
+
+
+def _status_code(error: BaseException) -> Optional[int]:
+    """HTTP status on a provider error or its causes (Anthropic's status_code, google-api-core's code)."""
+    while error is not None:
+        status = getattr(error, "status_code", None)
+        if status is None:
+            status = getattr(error, "code", None)
+        if isinstance(status, int):
+            return status
+        error = error.__cause__
+    return None
+
+
+def _is_retryable(error: BaseException) -> bool:
+    """
+    Whether a failed call may succeed if repeated.
+
+    Rate limits, timeouts and 5xx are transient; other 4xx (bad request,
+    auth, unknown model) are not, nor is unusable output from a finished
+    response, which repeats at a fixed temperature. Errors without a
+    status, such as dropped connections, are retried.
+    """
+    cause = error
+    while cause is not None:
+        if isinstance(cause, AgentOutputError):
+            return False
+        cause = cause.__cause__
+    status = _status_code(error)
+    return status is None or status >= 500 or status in _RETRYABLE_STATUS
+
+
+class RateLimiter:
+    """Token-bucket rate limiter that only sleeps when the request rate exceeds the quota."""
+
+    def __init__(self, capacity: float, refill_per_sec: float):
+        """
+        Initialize the rate limiter.
+
+        Args:
+            capacity: Maximum burst size (tokens available when idle)
+            refill_per_sec: Tokens added back per second
+        """
+        self.capacity = capacity
+        self.refill_per_sec = refill_per_sec
+        self.tokens = capacity
+        self.last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, n: int = 1):
+        """
+        Take n tokens, sleeping only for the deficit if the bucket is short.
+
+        Args:
+            n: Number of tokens (requests) to take
+        """
+        wait = self._reserve(n)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def aacquire(self, n: int = 1):
+        """Async variant of acquire() that yields to the event loop while waiting."""
+        wait = self._reserve(n)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def _reserve(self, n: int) -> float:
+        """Take n tokens and return how many seconds the caller must wait for them."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity,
+                              self.tokens + (now - self.last_refill) * self.refill_per_sec)
+            self.last_refill = now
+            # Tokens may go negative: the debt makes later callers queue behind this one
+            self.tokens -= n
+            deficit = -self.tokens
+
+        return deficit / self.refill_per_sec if deficit > 0 else 0.0
+
+
 class AgentWrapper:
     """Wrapper for agent calls with retry and timeout logic."""
 
     def __init__(self,
                  max_retries: int = None,
                  timeout: int = None,
-                 retry_delay: int = None):
+                 retry_delay: float = None,
+                 cache: Optional[MutableMapping] = None,
+                 rate_limiter: Optional[RateLimiter] = None):
         """
         Initialize the agent wrapper.
 
         Args:
             max_retries: Maximum number of retry attempts
             timeout: Timeout in seconds for each agent call
-            retry_delay: Delay in seconds between retries
+            retry_delay: Base delay in seconds for exponential backoff
+            cache: Mapping used to memoize results (defaults to an on-disk cache)
+            rate_limiter: Limiter to acquire from before each real agent call
         """
         self.max_retries = max_retries or config.MAX_RETRIES
         self.timeout = timeout or config.AGENT_TIMEOUT
-        self.retry_delay = retry_delay or config.RETRY_DELAY
+        self.retry_delay = retry_delay or config.RETRY_BASE
+        self.retry_cap = config.RETRY_CAP
+        self.cache = cache if cache is not None else diskcache.Cache(config.CACHE_DIR)
+        # Bounded in-process LRU in front of the (possibly on-disk) cache
+        self._memo: "OrderedDict[str, Any]" = OrderedDict()
+        self._memo_lock = threading.Lock()
+        self.memo_max_entries = config.MEMO_MAX_ENTRIES
+        self.rate_limiter = rate_limiter
+
+        # Single-flight: identical concurrent calls wait on the first caller's Future
+        self._inflight: Dict[str, Future] = {}
+        self._inflight_lock = threading.Lock()
+        # Async callers share one event loop, so their map needs no lock
+        self._ainflight: Dict[str, asyncio.Future] = {}
 
     def call_with_retry(self,
                        agent_func: Callable,
@@ -45,6 +197,13 @@ class AgentWrapper:
         """
         Call an agent function with retry logic and timeout.
 
+        The timeout is passed to the agent as a ``timeout`` keyword so the
+        provider SDK enforces it on the socket; no extra thread is involved.
+
+        Results are memoized: a cache hit returns immediately without
+        calling the agent or consuming rate-limit tokens. Identical calls
+        made while one is already in flight share its outcome.
+
         Args:
             agent_func: The agent function to call
             *args: Positional arguments for the agent function
@@ -59,64 +218,217 @@ class AgentWrapper:
             AgentTimeoutError: If all retries timeout
             AgentMaxRetriesError: If max retries exceeded
         """
-        last_error = None
+        key = self._cache_key(agent_func, args, kwargs)
+        hit, cached = self._lookup(key)
+        if hit:
+            return (True, cached)
+
+        with self._inflight_lock:
+            leader = self._inflight.get(key)
+            if leader is None:
+                future = Future()
+                self._inflight[key] = future
+
+        if leader is not None:
+            return leader.result()
+
+        try:
+            outcome = self._call_with_retries(agent_func, *args, **kwargs)
+            success, result = outcome
+            if success:
+                self._store(key, result)
+            future.set_result(outcome)
+            return outcome
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(key, None)
+
+    def _call_with_retries(self, agent_func: Callable, *args, **kwargs) -> Tuple[bool, Any]:
+        """
+        Run the retry loop for a single uncached agent call.
 
+        Raises:
+            AgentTimeoutError: If all retries timeout
+            AgentMaxRetriesError: If max retries exceeded
+            AgentPermanentError: If the provider rejects the request (not retried)
+        """
         for attempt in range(1, self.max_retries + 1):
             try:
-                # Call agent with timeout
-                result = self._call_with_timeout(agent_func, *args, **kwargs)
-                return (True, result)
+                if self.rate_limiter is not None:
+                    self.rate_limiter.acquire()
 
-            except FuturesTimeoutError:
-                last_error = f"Timeout ({self.timeout}s) on attempt {attempt}/{self.max_retries}"
-                print(f"  ⚠ {last_error}")
+                return (True, agent_func(*args, timeout=self.timeout, **kwargs))
 
+            except TimeoutError as e:
+                log.warning("Timeout (%ss) on attempt %d/%d", self.timeout, attempt, self.max_retries)
                 if attempt == self.max_retries:
-                    error_msg = f"Agent timeout after {self.max_retries} attempts ({self.timeout}s each)"
-                    raise AgentTimeoutError(error_msg)
-
-                # Wait before retrying
-                if attempt < self.max_retries:
-                    time.sleep(self.retry_delay)
+                    raise AgentTimeoutError(
+                        f"Agent timeout after {self.max_retries} attempts ({self.timeout}s each)"
+                    )
+                time.sleep(self._backoff_delay(attempt, e))
 
             except Exception as e:
-                last_error = f"Error on attempt {attempt}/{self.max_retries}: {str(e)}"
-                print(f"  ⚠ {last_error}")
+                if not _is_retryable(e):
+                    raise AgentPermanentError(f"Agent failed with a non-retryable error: {e}") from e
+                log.warning("Error on attempt %d/%d: %s", attempt, self.max_retries, e)
+                if attempt == self.max_retries:
+                    raise AgentMaxRetriesError(
+                        f"Agent failed after {self.max_retries} attempts. Last error: {e}"
+                    )
+                time.sleep(self._backoff_delay(attempt, e))
+
+        # Only reachable when max_retries < 1
+        return (False, f"No attempts made (max_retries={self.max_retries})")
+
+    async def acall_with_retry(self,
+                               agent_func: Callable,
+                               *args,
+                               **kwargs) -> Tuple[bool, Any]:
+        """
+        Async variant of call_with_retry() for coroutine agent functions.
+
+        Shares the cache and rate limiter with the sync path.
+
+        Raises:
+            AgentTimeoutError: If all retries timeout
+            AgentMaxRetriesError: If max retries exceeded
+        """
+        key = self._cache_key(agent_func, args, kwargs)
+        hit, cached = self._lookup(key)
+        if hit:
+            return (True, cached)
+
+        leader = self._ainflight.get(key)
+        if leader is not None:
+            return await asyncio.shield(leader)
+
+        future = asyncio.get_running_loop().create_future()
+        self._ainflight[key] = future
+        try:
+            outcome = await self._acall_with_retries(agent_func, *args, **kwargs)
+            success, result = outcome
+            if success:
+                self._store(key, result)
+            future.set_result(outcome)
+            return outcome
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark retrieved so a leader without followers doesn't log a warning
+            future.exception()
+            raise
+        finally:
+            self._ainflight.pop(key, None)
+
+    async def _acall_with_retries(self, agent_func: Callable, *args, **kwargs) -> Tuple[bool, Any]:
+        """Async retry loop; mirrors _call_with_retries()."""
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                if self.rate_limiter is not None:
+                    await self.rate_limiter.aacquire()
+
+                return (True, await agent_func(*args, timeout=self.timeout, **kwargs))
 
+            except TimeoutError as e:
+                log.warning("Timeout (%ss) on attempt %d/%d", self.timeout, attempt, self.max_retries)
                 if attempt == self.max_retries:
-                    error_msg = f"Agent failed after {self.max_retries} attempts. Last error: {str(e)}"
-                    raise AgentMaxRetriesError(error_msg)
+                    raise AgentTimeoutError(
+                        f"Agent timeout after {self.max_retries} attempts ({self.timeout}s each)"
+                    )
+                await asyncio.sleep(self._backoff_delay(attempt, e))
 
-                # Wait before retrying
-                if attempt < self.max_retries:
-                    time.sleep(self.retry_delay)
+            except Exception as e:
+                if not _is_retryable(e):
+                    raise AgentPermanentError(f"Agent failed with a non-retryable error: {e}") from e
+                log.warning("Error on attempt %d/%d: %s", attempt, self.max_retries, e)
+                if attempt == self.max_retries:
+                    raise AgentMaxRetriesError(
+                        f"Agent failed after {self.max_retries} attempts. Last error: {e}"
+                    )
+                await asyncio.sleep(self._backoff_delay(attempt, e))
 
-        # Should not reach here, but just in case
-        return (False, last_error)
+        # Only reachable when max_retries < 1
+        return (False, f"No attempts made (max_retries={self.max_retries})")
 
-    def _call_with_timeout(self, func: Callable, *args, **kwargs) -> Any:
+    def forget(self, agent_func: Callable, *args, **kwargs):
         """
-        Call a function with timeout using ThreadPoolExecutor.
+        Drop a memoized result from both cache tiers.
 
-        Args:
-            func: Function to call
-            *args: Positional arguments
-            **kwargs: Keyword arguments
+        For callers that reject a result after the call succeeded (e.g.
+        output that fails validation), so the bad value is not served
+        again on the next call.
+        """
+        key = self._cache_key(agent_func, args, kwargs)
+        with self._memo_lock:
+            self._memo.pop(key, None)
+        self.cache.pop(key, None)
 
-        Returns:
-            Function result
+    def _backoff_delay(self, attempt: int, error: BaseException) -> float:
+        """
+        Seconds to wait before the next attempt.
 
-        Raises:
-            TimeoutError: If function call exceeds timeout
+        Honors a provider Retry-After hint of up to retry_cap seconds,
+        otherwise uses full-jitter exponential backoff:
+        uniform(0, min(cap, base * 2**(attempt-1))). Longer or malformed
+        hints fall back to jitter so a worker never stalls for minutes.
         """
-        with ThreadPoolExecutor(max_workers=1) as executor:
-            future = executor.submit(func, *args, **kwargs)
-            try:
-                result = future.result(timeout=self.timeout)
-                return result
-            except FuturesTimeoutError:
-                future.cancel()
-                raise
+        retry_after = _retry_after(error)
+        if retry_after is not None and 0 <= retry_after <= self.retry_cap:
+            return retry_after
+        return random.uniform(0, min(self.retry_cap, self.retry_delay * (2 ** (attempt - 1))))
+
+    def _lookup(self, key: str) -> Tuple[bool, Any]:
+        """Return (hit, value), promoting on-disk hits into the in-process tier."""
+        with self._memo_lock:
+            if key in self._memo:
+                self._memo.move_to_end(key)
+                return (True, self._memo[key])
+        if key in self.cache:
+            value = self.cache[key]
+            self._remember(key, value)
+            return (True, value)
+        return (False, None)
+
+    def _store(self, key: str, value: Any):
+        """Write a successful result to both cache tiers."""
+        self._remember(key, value)
+        self.cache[key] = value
+
+    def _remember(self, key: str, value: Any):
+        """Insert into the in-process LRU, evicting the least recently used entry."""
+        with self._memo_lock:
+            self._memo[key] = value
+            self._memo.move_to_end(key)
+            if len(self._memo) > self.memo_max_entries:
+                self._memo.popitem(last=False)
+
+    def _cache_key(self, agent_func: Callable, args: tuple, kwargs: dict) -> str:
+        """
+        Build a stable cache key from the model, the agent and its inputs.
+
+        Translation agents are keyed by (source_lang, target_lang, model),
+        so their sync and async methods share entries while different
+        language pairs never collide. Other callables are keyed by their
+        qualified name.
+        """
+        owner = getattr(agent_func, "__self__", None)
+        if owner is not None and hasattr(owner, "source_lang"):
+            name = f"{owner.source_lang}|{owner.target_lang}|{owner.model_name}"
+        elif owner is not None:
+            name = f"{config.TRANSLATION_MODEL}|{type(owner).__qualname__}.{agent_func.__name__}"
+        else:
+            name = f"{config.TRANSLATION_MODEL}|{agent_func.__qualname__}"
+
+        text = "|".join(map(str, args))
+        if kwargs:
+            text += "|" + repr(sorted(kwargs.items()))
+
+        return _digest(f"{name}|{text}".encode())
 
 
 class AgentCallResult:
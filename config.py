@@ -3,6 +3,8 @@ Configuration settings for the Translation Quality Assessment Pipeline.
 """
 
 import os
+import functools
+from typing import Tuple
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -11,20 +13,30 @@ load_dotenv()
 NUM_SENTENCES = 30
 MIN_WORDS = 10
 MAX_WORDS = 20
+SENTENCES_PER_REQUEST = 10  # sentences asked for per generation call (calls run in parallel)
 
 # Agent settings
 AGENT_TIMEOUT = 60  # seconds
 MAX_RETRIES = 3
-RETRY_DELAY = 2  # seconds between retries
+RETRY_BASE = 1.0  # base delay (seconds) for full-jitter exponential backoff
+RETRY_CAP = 30.0  # maximum backoff delay (seconds)
+MAX_CONCURRENT_SENTENCES = 5  # sentences translated in parallel
 
 # Embedding model
 EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+EMBEDDING_BATCH_SIZE = 128  # sentences per encode forward pass
+SCORE_BATCH_SIZE = 32  # completed pairs scored together while translation runs
+SCORE_BATCH_WAIT = 0.5  # seconds to wait for a scoring batch to fill
 
 # Output settings
 OUTPUT_DIR = "./results"
-SAVE_INTERMEDIATE = True
+SAVE_INTERMEDIATE = True  # stream each completed sentence to STREAM_FILENAME
+STREAM_FILENAME = "results.jsonl"
+LOG_FILENAME = "pipeline.log"  # detailed per-call log (rotated)
 PLOT_FILENAME = "distance_plot.png"
 RESULTS_FILENAME = "translation_results.json"
+CACHE_DIR = os.path.join(OUTPUT_DIR, ".agent_cache")  # memoized agent responses
+MEMO_MAX_ENTRIES = 10_000  # in-process LRU of agent responses in front of CACHE_DIR
 
 # API Keys (load from environment)
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
@@ -43,6 +55,43 @@ ANTHROPIC_MODEL = "claude-3-5-sonnet-20241022"  # Claude 3.5 Sonnet
 # Select model based on provider
 TRANSLATION_MODEL = GEMINI_MODEL if API_PROVIDER == "gemini" else ANTHROPIC_MODEL
 TEMPERATURE = 0.0  # For deterministic translations
+STRUCTURED_OUTPUT = False  # Constrain each translation to a JSON field instead of free text
 
-# Wait time between sentences (in seconds)
-WAIT_TIME_BETWEEN_SENTENCES = 30  # 30 seconds wait between sentences
+# Batch mode: submit the translation legs as offline provider batch jobs (cheaper,
+# slower); used by both main.py and TranslationPipeline.run_batch. Sentence
+# generation always runs live, since translation cannot start without it
+USE_BATCH_MODE = False
+BATCH_POLL_INTERVAL = 30  # seconds between batch job status checks
+
+# Provider rate limits (requests per minute), enforced by a token bucket
+GEMINI_RPM = 15
+ANTHROPIC_RPM = 50
+REQUESTS_PER_MINUTE = GEMINI_RPM if API_PROVIDER == "gemini" else ANTHROPIC_RPM
+
+
+@functools.lru_cache(maxsize=1)
+def validate() -> Tuple[str, ...]:
+    """
+    Validate settings and create the output directory (runs once per process).
+
+    Returns:
+        Tuple of human-readable problems; empty if the configuration is usable
+    """
+    issues = []
+
+    # Check API key based on provider
+    if API_PROVIDER == "gemini":
+        if not GOOGLE_API_KEY:
+            issues.append("Missing Google AI API key. Please set GOOGLE_API_KEY in .env file or environment.")
+    elif API_PROVIDER == "anthropic":
+        if not ANTHROPIC_API_KEY:
+            issues.append("Missing Anthropic API key. Please set ANTHROPIC_API_KEY in .env file or environment.")
+    else:
+        issues.append(f"Invalid API_PROVIDER: {API_PROVIDER}. Must be 'gemini' or 'anthropic'.")
+
+    try:
+        os.makedirs(OUTPUT_DIR, exist_ok=True)
+    except OSError as e:
+        issues.append(f"Cannot create output directory: {e}")
+
+    return tuple(issues)
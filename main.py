@@ -13,29 +13,15 @@ Requirements:
 
 import sys
 import os
-from pipeline import TranslationQualityPipeline
+import logging
+import threading
+from logging.handlers import RotatingFileHandler
 import config
 
 
 def check_prerequisites():
     """Check if all prerequisites are met."""
-    issues = []
-
-    # Check API key based on provider
-    if config.API_PROVIDER == "gemini":
-        if not config.GOOGLE_API_KEY:
-            issues.append("Missing Google AI API key. Please set GOOGLE_API_KEY in .env file or environment.")
-    elif config.API_PROVIDER == "anthropic":
-        if not config.ANTHROPIC_API_KEY:
-            issues.append("Missing Anthropic API key. Please set ANTHROPIC_API_KEY in .env file or environment.")
-    else:
-        issues.append(f"Invalid API_PROVIDER: {config.API_PROVIDER}. Must be 'gemini' or 'anthropic'.")
-
-    # Check if output directory can be created
-    try:
-        os.makedirs(config.OUTPUT_DIR, exist_ok=True)
-    except Exception as e:
-        issues.append(f"Cannot create output directory: {e}")
+    issues = config.validate()
 
     if issues:
         print("Prerequisites check failed:")
@@ -53,6 +39,21 @@ def check_prerequisites():
     return True
 
 
+def configure_logging():
+    """Send detailed per-call logs to a rotating file, keeping the console for progress."""
+    handler = RotatingFileHandler(
+        os.path.join(config.OUTPUT_DIR, config.LOG_FILENAME),
+        maxBytes=5 * 1024 * 1024,
+        backupCount=3,
+        encoding="utf-8"
+    )
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+        handlers=[handler]
+    )
+
+
 def print_configuration():
     """Print current configuration."""
     print("\nConfiguration:")
@@ -60,11 +61,19 @@ def print_configuration():
     print(f"  Words per sentence: {config.MIN_WORDS}-{config.MAX_WORDS}")
     print(f"  Agent timeout: {config.AGENT_TIMEOUT}s")
     print(f"  Max retries: {config.MAX_RETRIES}")
-    print(f"  Retry delay: {config.RETRY_DELAY}s")
-    print(f"  Wait time between sentences: {config.WAIT_TIME_BETWEEN_SENTENCES}s")
+    print(f"  Retry backoff: {config.RETRY_BASE}s base, {config.RETRY_CAP}s cap (full jitter)")
+    print(f"  Concurrent sentences: {config.MAX_CONCURRENT_SENTENCES}")
+    print(f"  Rate limit: {config.REQUESTS_PER_MINUTE} requests/min")
     print()
 
 
+def warm_up_embedding_model():
+    """Start loading the embedding model on a daemon thread."""
+    from similarity_calculator import load_model
+
+    threading.Thread(target=load_model, name="embedding-warmup", daemon=True).start()
+
+
 def main():
     """Main execution function."""
     print("\n" + "=" * 60)
@@ -76,23 +85,29 @@ def main():
     print("  3. Measure semantic drift using cosine distance")
     print("  4. Generate statistics and visualization")
 
-    # Calculate estimated time including wait time
-    translation_time = config.NUM_SENTENCES * 0.2  # Base translation time in minutes
-    wait_time = (config.NUM_SENTENCES - 1) * config.WAIT_TIME_BETWEEN_SENTENCES / 60  # Wait time in minutes
-    total_time = translation_time + wait_time
+    # Calculate estimated time: concurrent translation, bounded by the provider rate limit
+    translation_time = config.NUM_SENTENCES * 0.2 / config.MAX_CONCURRENT_SENTENCES  # minutes
+    total_requests = 3 * config.NUM_SENTENCES
+    rate_limited_time = max(0, total_requests - config.REQUESTS_PER_MINUTE) / config.REQUESTS_PER_MINUTE
+    total_time = max(translation_time, rate_limited_time)
 
     print(f"\nEstimated time: {total_time:.0f} minutes")
-    if config.WAIT_TIME_BETWEEN_SENTENCES > 0:
-        print(f"  (includes {wait_time:.0f} minutes of wait time between sentences)")
+    if rate_limited_time > translation_time:
+        print(f"  (bounded by the {config.REQUESTS_PER_MINUTE} requests/min rate limit)")
     print("=" * 60)
 
     # Check prerequisites
     if not check_prerequisites():
         sys.exit(1)
 
+    configure_logging()
+
     # Print configuration
     print_configuration()
 
+    # Load the embedding model in the background while waiting for confirmation
+    warm_up_embedding_model()
+
     # Confirm execution
     try:
         response = input("Do you want to proceed? (yes/no): ").strip().lower()
@@ -105,6 +120,8 @@ def main():
 
     # Run pipeline
     try:
+        from pipeline import TranslationQualityPipeline
+
         pipeline = TranslationQualityPipeline()
         pipeline.run()
 
@@ -114,6 +131,7 @@ def main():
         print(f"\nResults saved to: {config.OUTPUT_DIR}/")
         print(f"  - {config.RESULTS_FILENAME} (JSON data)")
         print(f"  - {config.PLOT_FILENAME} (Visualization)")
+        print(f"  - {config.LOG_FILENAME} (Detailed log)")
         print("\nThank you for using Translation Quality Assessment Pipeline!")
 
     except KeyboardInterrupt:
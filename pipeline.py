@@ -4,18 +4,25 @@ Coordinates the entire translation quality assessment process.
 """
 
 import os
-import json
 import time
+import logging
+import asyncio
+import functools
 from datetime import datetime
 from typing import List, Dict
+import diskcache
+import numpy as np
+import orjson
 from tqdm import tqdm
 
-from sentence_generator import SentenceGenerator
-from translation_agents import TranslationPipeline
-from similarity_calculator import SimilarityCalculator
-from agent_wrapper import AgentWrapper, AgentTimeoutError, AgentMaxRetriesError
+from agent_wrapper import AgentWrapper, AgentTimeoutError, AgentMaxRetriesError, RateLimiter
 import config
 
+log = logging.getLogger("pipeline")
+
+# orjson writes UTF-8 and ISO-8601 datetimes natively
+_JSON_OPTIONS = orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY
+
 
 class TranslationQualityPipeline:
     """Main pipeline orchestrator for translation quality assessment."""
@@ -26,15 +33,36 @@ class TranslationQualityPipeline:
         print("Translation Quality Assessment Pipeline")
         print("=" * 60)
 
-        # Create output directory
-        os.makedirs(config.OUTPUT_DIR, exist_ok=True)
+        # Validate settings and create the output directory (cached after first call)
+        issues = config.validate()
+        if issues:
+            raise ValueError("; ".join(issues))
+
+        # Heavy SDK and model imports are deferred until a pipeline is actually built
+        from sentence_generator import SentenceGenerator
+        from translation_agents import TranslationPipeline
+        from similarity_calculator import SimilarityCalculator
 
         # Initialize components
         print("\nInitializing components...")
         self.sentence_generator = SentenceGenerator()
-        self.translation_pipeline = TranslationPipeline()
-        self.similarity_calculator = SimilarityCalculator()
-        self.agent_wrapper = AgentWrapper()
+        self.cache = diskcache.Cache(config.CACHE_DIR)
+        self._rate_limiter = RateLimiter(
+            capacity=config.REQUESTS_PER_MINUTE,
+            refill_per_sec=config.REQUESTS_PER_MINUTE / 60
+        )
+        self.agent_wrapper = AgentWrapper(cache=self.cache, rate_limiter=self._rate_limiter)
+        self.translation_pipeline = TranslationPipeline(agent_wrapper=self.agent_wrapper)
+        self.similarity_calculator = SimilarityCalculator(cache=self.cache)
+
+        # The agent for each step is fixed for the run, so bind it once
+        call = self.agent_wrapper.acall_with_retry
+        self._translate_en_ru = functools.partial(call, self.translation_pipeline.agent1.atranslate)
+        self._translate_ru_he = functools.partial(call, self.translation_pipeline.agent2.atranslate)
+        self._translate_he_en = functools.partial(call, self.translation_pipeline.agent3.atranslate)
+
+        # Per-sentence results are streamed here as they complete (opened by run())
+        self._jsonl = None
 
         # Storage for results
         self.results: List[Dict] = []
@@ -44,6 +72,10 @@ class TranslationQualityPipeline:
     def run(self):
         """Execute the entire pipeline."""
         try:
+            # Append, so rows checkpointed by an earlier crashed run are kept
+            if config.SAVE_INTERMEDIATE:
+                self._jsonl = open(os.path.join(config.OUTPUT_DIR, config.STREAM_FILENAME), "ab")
+
             self.start_time = datetime.now()
 
             # Step 1: Generate sentences
@@ -51,6 +83,7 @@ class TranslationQualityPipeline:
 
             # Step 2: Process each sentence through translation pipeline
             self._process_sentences(sentences)
+            self._score_results()
 
             # Step 3: Analyze results
             self._analyze_and_visualize()
@@ -69,6 +102,7 @@ class TranslationQualityPipeline:
             print(f"\nProcessed {len(self.results)} sentences before failure.")
             if self.results:
                 print("Saving partial results...")
+                self._score_results()
                 self._save_partial_results()
             raise
 
@@ -78,6 +112,13 @@ class TranslationQualityPipeline:
             print(f"{'!' * 60}")
             raise
 
+        finally:
+            self.translation_pipeline.close()
+            self.cache.close()
+            if self._jsonl is not None:
+                self._jsonl.close()
+                self._jsonl = None
+
     def _generate_sentences(self) -> List[str]:
         """Generate sentences for testing."""
         print(f"\n{'=' * 60}")
@@ -98,81 +139,186 @@ class TranslationQualityPipeline:
         return sentences
 
     def _process_sentences(self, sentences: List[str]):
-        """Process all sentences through the translation pipeline."""
+        """Process all sentences through the translation pipeline concurrently."""
         print(f"\n{'=' * 60}")
         print("Step 2: Translation Pipeline Processing")
         print(f"{'=' * 60}")
 
-        for idx, sentence in enumerate(tqdm(sentences, desc="Processing sentences"), 1):
-            print(f"\nSentence {idx}/{len(sentences)}")
-            print(f"  Original: {sentence[:60]}...")
-
-            start_time = time.time()
-
-            try:
-                # Translate through pipeline with retry logic
-                russian_text = self._call_agent_with_retry(
-                    self.translation_pipeline.agent1.translate,
-                    sentence,
-                    "EN → RU"
-                )
-
-                hebrew_text = self._call_agent_with_retry(
-                    self.translation_pipeline.agent2.translate,
-                    russian_text,
-                    "RU → HE"
-                )
-
-                final_text = self._call_agent_with_retry(
-                    self.translation_pipeline.agent3.translate,
-                    hebrew_text,
-                    "HE → EN"
-                )
-
-                # Calculate similarity
-                cosine_distance = self.similarity_calculator.calculate_cosine_distance(
-                    sentence, final_text
-                )
-
-                duration = time.time() - start_time
-
-                # Store result
-                result = {
-                    'index': idx,
-                    'original_sentence': sentence,
-                    'russian_translation': russian_text,
-                    'hebrew_translation': hebrew_text,
-                    'final_sentence': final_text,
-                    'cosine_distance': cosine_distance,
-                    'processing_time': duration,
-                    'timestamp': datetime.now().isoformat()
-                }
+        if config.USE_BATCH_MODE:
+            self._process_sentences_batch(sentences)
+        else:
+            asyncio.run(self._process_sentences_async(sentences))
+
+    def _process_sentences_batch(self, sentences: List[str]):
+        """Translate all sentences as offline provider batch jobs, then score them."""
+        print("Submitting translations as batch jobs (this may take a while)...")
+
+        start_time = time.perf_counter()
+        translated = self.translation_pipeline.run_batch(sentences)
+        # Batch jobs have no per-sentence timing; record each sentence's share
+        share = (time.perf_counter() - start_time) / max(len(sentences), 1)
+
+        for idx, translation in enumerate(translated, 1):
+            self.results.append({
+                'index': idx,
+                'original_sentence': translation['original'],
+                'russian_translation': translation['russian'],
+                'hebrew_translation': translation['hebrew'],
+                'final_sentence': translation['final'],
+                'cosine_distance': None,
+                'processing_time': share,
+                'timestamp': time.time()
+            })
+
+        self._score_results()
+        for result in self.results:
+            self._stream_result(result)
+
+    async def _process_sentences_async(self, sentences: List[str]):
+        """Run every sentence on one event loop, at most MAX_CONCURRENT_SENTENCES at a time."""
+        total = len(sentences)
+        semaphore = asyncio.Semaphore(config.MAX_CONCURRENT_SENTENCES)
+        tasks = [
+            asyncio.create_task(self._process_sentence_async(idx, sentence, total, semaphore))
+            for idx, sentence in enumerate(sentences, 1)
+        ]
+        # Completed sentences are scored while the rest are still translating
+        scoring_queue: asyncio.Queue = asyncio.Queue()
+        scorer = asyncio.create_task(self._score_stream(scoring_queue))
 
-                self.results.append(result)
+        try:
+            with tqdm(total=total, desc="Processing sentences") as progress:
+                for next_done in asyncio.as_completed(tasks):
+                    try:
+                        result = await next_done
+                    except (AgentTimeoutError, AgentMaxRetriesError) as e:
+                        tqdm.write(f"  ✗ Failed: {str(e)}")
+                        log.error("Sentence failed: %s", e)
+                        raise
+
+                    self.results.append(result)
+                    scoring_queue.put_nowait(result)
+                    progress.update(1)
+
+                    tqdm.write(f"  Sentence {result['index']}/{total} "
+                               f"({result['processing_time']:.2f}s): "
+                               f"{result['final_sentence'][:60]}...")
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            # Let the scorer drain what has completed, so it is checkpointed
+            scoring_queue.put_nowait(None)
+            await scorer
+            # Sentences complete out of order; keep results in input order
+            self.results.sort(key=lambda r: r['index'])
+            # Async connections are bound to this loop; close them before it ends
+            await self.translation_pipeline.aclose()
+
+    async def _score_stream(self, queue: asyncio.Queue):
+        """
+        Score completed results in small batches until a None sentinel arrives.
 
-                print(f"  Final: {final_text[:60]}...")
-                print(f"  Cosine distance: {cosine_distance:.4f}")
-                print(f"  Time: {duration:.2f}s")
+        A batch is flushed once it holds SCORE_BATCH_SIZE pairs or
+        SCORE_BATCH_WAIT seconds have passed since its first pair. Encoding
+        runs in a worker thread so translations keep flowing meanwhile;
+        each scored result is then appended to the JSONL checkpoint.
 
-                # Save intermediate results periodically
-                if config.SAVE_INTERMEDIATE and idx % 10 == 0:
-                    self._save_intermediate_results(idx)
+        Args:
+            queue: Queue of completed result dictionaries
+        """
+        loop = asyncio.get_running_loop()
+        finished = False
+
+        while not finished:
+            result = await queue.get()
+            if result is None:
+                break
+
+            batch = [result]
+            deadline = loop.time() + config.SCORE_BATCH_WAIT
+            while len(batch) < config.SCORE_BATCH_SIZE:
+                try:
+                    result = await asyncio.wait_for(queue.get(), deadline - loop.time())
+                except asyncio.TimeoutError:
+                    break
+                if result is None:
+                    finished = True
+                    break
+                batch.append(result)
+
+            distances = await asyncio.to_thread(
+                self.similarity_calculator.calculate_batch_distances,
+                [r['original_sentence'] for r in batch],
+                [r['final_sentence'] for r in batch]
+            )
+            for result, distance in zip(batch, distances):
+                result['cosine_distance'] = distance
+                self._stream_result(result)
+
+    async def _process_sentence_async(self,
+                                      idx: int,
+                                      sentence: str,
+                                      total: int,
+                                      semaphore: asyncio.Semaphore) -> Dict:
+        """Run one sentence through EN → RU → HE → EN (scored by _score_stream)."""
+        async with semaphore:
+            log.info("Sentence %d/%d original: %s", idx, total, sentence)
+
+            start_time = time.perf_counter()
+
+            # Translate through pipeline with retry logic
+            russian_text = await self._call_agent_with_retry(
+                self._translate_en_ru,
+                sentence,
+                f"[{idx}] EN → RU"
+            )
+
+            hebrew_text = await self._call_agent_with_retry(
+                self._translate_ru_he,
+                russian_text,
+                f"[{idx}] RU → HE"
+            )
+
+            final_text = await self._call_agent_with_retry(
+                self._translate_he_en,
+                hebrew_text,
+                f"[{idx}] HE → EN"
+            )
+
+            duration = time.perf_counter() - start_time
+
+        return {
+            'index': idx,
+            'original_sentence': sentence,
+            'russian_translation': russian_text,
+            'hebrew_translation': hebrew_text,
+            'final_sentence': final_text,
+            'cosine_distance': None,
+            'processing_time': duration,
+            'timestamp': time.time()  # epoch float; formatted when persisted
+        }
 
-                # Wait between sentences (skip wait after the last sentence)
-                if idx < len(sentences) and config.WAIT_TIME_BETWEEN_SENTENCES > 0:
-                    print(f"\n  Waiting {config.WAIT_TIME_BETWEEN_SENTENCES} seconds before next sentence...")
-                    time.sleep(config.WAIT_TIME_BETWEEN_SENTENCES)
+    def _score_results(self):
+        """Compute cosine distances for all unscored results in one batched encode."""
+        pending = [r for r in self.results if r['cosine_distance'] is None]
+        if not pending:
+            return
 
-            except (AgentTimeoutError, AgentMaxRetriesError) as e:
-                print(f"\n  ✗ Failed: {str(e)}")
-                raise
+        print(f"\nScoring {len(pending)} sentence pairs...")
+        distances = self.similarity_calculator.calculate_batch_distances(
+            [r['original_sentence'] for r in pending],
+            [r['final_sentence'] for r in pending]
+        )
+        for result, distance in zip(pending, distances):
+            result['cosine_distance'] = distance
 
-    def _call_agent_with_retry(self, agent_func, text: str, label: str) -> str:
+    async def _call_agent_with_retry(self, translate, text: str, label: str) -> str:
         """
         Call an agent with retry logic.
 
         Args:
-            agent_func: Agent translation function
+            translate: Pre-bound wrapper call, e.g. self._translate_en_ru
             text: Text to translate
             label: Label for logging (e.g., "EN → RU")
 
@@ -183,15 +329,15 @@ class TranslationQualityPipeline:
             AgentTimeoutError: If agent times out
             AgentMaxRetriesError: If max retries exceeded
         """
-        start = time.time()
-        success, result = self.agent_wrapper.call_with_retry(agent_func, text)
-        duration = time.time() - start
+        start = time.perf_counter()
+        success, result = await translate(text)
+        duration = time.perf_counter() - start
 
         if success:
-            print(f"  {label}: ✓ ({duration:.1f}s)")
+            log.info("%s: ok (%.1fs)", label, duration)
             return result
         else:
-            print(f"  {label}: ✗ ({result})")
+            log.error("%s: failed (%s)", label, result)
             raise Exception(result)
 
     def _analyze_and_visualize(self):
@@ -205,7 +351,7 @@ class TranslationQualityPipeline:
             return
 
         # Extract distances
-        distances = [r['cosine_distance'] for r in self.results]
+        distances = self._distances()
 
         # Calculate statistics
         stats = self.similarity_calculator.calculate_statistics(distances)
@@ -225,8 +371,15 @@ class TranslationQualityPipeline:
         # Save results
         self._save_results(stats)
 
-    def _create_plot(self, distances: List[float], stats: dict):
+    def _distances(self) -> np.ndarray:
+        """Collect cosine distances from the results into a float64 array."""
+        return np.fromiter((r['cosine_distance'] for r in self.results),
+                           dtype=np.float64, count=len(self.results))
+
+    def _create_plot(self, distances: np.ndarray, stats: dict):
         """Create and save distance plot."""
+        import matplotlib
+        matplotlib.use("Agg", force=False)
         import matplotlib.pyplot as plt
 
         plt.figure(figsize=(12, 6))
@@ -257,7 +410,7 @@ class TranslationQualityPipeline:
 
         # Save plot
         plot_path = os.path.join(config.OUTPUT_DIR, config.PLOT_FILENAME)
-        plt.savefig(plot_path, dpi=300, bbox_inches='tight')
+        plt.savefig(plot_path, dpi=100)
         print(f"\nPlot saved to: {plot_path}")
 
         plt.close()
@@ -266,10 +419,10 @@ class TranslationQualityPipeline:
         """Save complete results to JSON file."""
         output = {
             'metadata': {
-                'timestamp': datetime.now().isoformat(),
+                'timestamp': datetime.now(),
                 'total_sentences': len(self.results),
-                'start_time': self.start_time.isoformat() if self.start_time else None,
-                'end_time': self.end_time.isoformat() if self.end_time else None,
+                'start_time': self.start_time,
+                'end_time': self.end_time,
                 'duration_seconds': (self.end_time - self.start_time).total_seconds() if self.end_time and self.start_time else None,
                 'config': {
                     'num_sentences': config.NUM_SENTENCES,
@@ -282,52 +435,52 @@ class TranslationQualityPipeline:
                 }
             },
             'statistics': stats,
-            'sentences': self.results
+            'sentences': [self._persistable(r) for r in self.results]
         }
 
         results_path = os.path.join(config.OUTPUT_DIR, config.RESULTS_FILENAME)
-        with open(results_path, 'w', encoding='utf-8') as f:
-            json.dump(output, f, indent=2, ensure_ascii=False)
+        with open(results_path, 'wb') as f:
+            f.write(orjson.dumps(output, option=_JSON_OPTIONS))
 
         print(f"Results saved to: {results_path}")
 
-    def _save_intermediate_results(self, current_idx: int):
-        """Save intermediate results during processing."""
-        filename = f"intermediate_results_{current_idx}.json"
-        filepath = os.path.join(config.OUTPUT_DIR, filename)
+    @staticmethod
+    def _persistable(result: Dict) -> Dict:
+        """Copy a result with its epoch timestamp converted to a datetime for output."""
+        return {**result, 'timestamp': datetime.fromtimestamp(result['timestamp'])}
 
-        data = {
-            'processed_count': current_idx,
-            'timestamp': datetime.now().isoformat(),
-            'sentences': self.results
-        }
+    def _stream_result(self, result: Dict):
+        """Append one completed sentence to the JSONL stream and fsync it."""
+        if self._jsonl is None:
+            return
 
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        self._jsonl.write(orjson.dumps(self._persistable(result), option=orjson.OPT_APPEND_NEWLINE))
+        self._jsonl.flush()
+        os.fsync(self._jsonl.fileno())
 
     def _save_partial_results(self):
         """Save partial results when pipeline fails."""
         if not self.results:
             return
 
-        distances = [r['cosine_distance'] for r in self.results]
+        distances = self._distances()
         stats = self.similarity_calculator.calculate_statistics(distances)
 
         output = {
             'metadata': {
                 'status': 'PARTIAL - Pipeline stopped early',
-                'timestamp': datetime.now().isoformat(),
+                'timestamp': datetime.now(),
                 'sentences_processed': len(self.results),
                 'sentences_expected': config.NUM_SENTENCES
             },
             'statistics': stats,
-            'sentences': self.results
+            'sentences': [self._persistable(r) for r in self.results]
         }
 
         filename = f"partial_results_{len(self.results)}_sentences.json"
         filepath = os.path.join(config.OUTPUT_DIR, filename)
 
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(output, f, indent=2, ensure_ascii=False)
+        with open(filepath, 'wb') as f:
+            f.write(orjson.dumps(output, option=_JSON_OPTIONS))
 
         print(f"Partial results saved to: {filepath}")
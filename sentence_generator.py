@@ -4,11 +4,64 @@ Generates English sentences for translation quality assessment.
 Supports both Gemini and Anthropic APIs.
 """
 
+import re
 import random
-from typing import List
-import google.generativeai as genai
-from anthropic import Anthropic
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
 import config
+from translation_agents import aclose_loop_clients, loop_anthropic_client, loop_gemini_model
+
+
+# Matches a numbered list line such as "12. The sentence text."
+_NUM_LINE = re.compile(r'^\s*(\d+)\.\s*(.+?)\s*$')
+
+# Output budget per requested sentence (up to 20 words plus its number)
+_TOKENS_PER_SENTENCE = 40
+
+# Each concurrent chunk is steered to its own topic; identical prompts sent
+# at once tend to come back with overlapping sentences
+_TOPICS = [
+    "technology", "nature", "daily life", "science", "culture",
+    "history", "travel", "food", "sports", "the arts", "health", "work",
+]
+
+_TEMPLATES = [
+    "The {adj} {noun} {verb} across the {place} while the {weather} {verb2}.",
+    "Scientists have discovered that {noun} can {verb} in unexpected ways when exposed to {condition}.",
+    "Every morning, the {profession} would {verb} before heading to the {place} to start work.",
+    "In the distant {place}, ancient {noun} still {verb} beneath the {adj} {noun2}.",
+    "Technology has revolutionized how we {verb} and interact with {noun} in modern society.",
+    "The {adj} landscape stretched endlessly, with {noun} visible in every direction we looked.",
+    "Children often {verb} when they encounter {noun} for the first time in their lives.",
+    "Historical records suggest that {profession} used to {verb} differently than they do today.",
+    "The {weather} conditions made it difficult to {verb} safely through the {place} yesterday.",
+    "Researchers believe that understanding {noun} could help us {verb} more effectively in the future."
+]
+
+_TEMPLATE_WORDS = {
+    "adj": ["beautiful", "ancient", "modern", "mysterious", "vibrant", "quiet", "massive", "tiny"],
+    "noun": ["mountain", "river", "city", "technology", "culture", "tradition", "discovery", "innovation"],
+    "verb": ["flows", "develops", "transforms", "appears", "grows", "changes", "evolves", "operates"],
+    "verb2": ["continues", "persists", "remains", "develops"],
+    "place": ["valley", "marketplace", "forest", "ocean", "countryside", "metropolis"],
+    "weather": ["sun", "wind", "rain", "storm"],
+    "condition": ["sunlight", "pressure", "temperature", "darkness"],
+    "profession": ["teacher", "doctor", "engineer", "artist", "scientist"],
+    "noun2": ["horizon", "surface", "canopy", "structure"]
+}
+
+
+class _LazyChoices(dict):
+    """Mapping for str.format_map that picks a random word per placeholder."""
+
+    def __init__(self, words: Dict[str, List[str]], choice):
+        super().__init__()
+        self.words = words
+        self.choice = choice
+
+    def __missing__(self, key: str) -> str:
+        return self.choice(self.words[key])
 
 
 class SentenceGenerator:
@@ -35,18 +88,8 @@ class SentenceGenerator:
         if not self.api_key:
             raise ValueError(f"API key is required for provider {self.provider}")
 
-        # Initialize the appropriate API client
-        if self.provider == "gemini":
-            genai.configure(api_key=self.api_key)
-            self.model = genai.GenerativeModel(
-                model_name=config.TRANSLATION_MODEL,
-                generation_config={
-                    "temperature": 0.7,  # Some creativity for diversity
-                    "max_output_tokens": 4000,
-                }
-            )
-        elif self.provider == "anthropic":
-            self.client = Anthropic(api_key=self.api_key)
+        # API clients are bound to an event loop, so each generate_sentences()
+        # call creates them on its own loop (see _generate_chunk_async)
 
     def generate_sentences(self,
                           num_sentences: int = 100,
@@ -55,6 +98,10 @@ class SentenceGenerator:
         """
         Generate diverse English sentences.
 
+        The request is split into chunks of config.SENTENCES_PER_REQUEST
+        sentences that are generated concurrently, since output decoding
+        dominates the latency of one large request.
+
         Args:
             num_sentences: Number of sentences to generate
             min_words: Minimum words per sentence
@@ -65,54 +112,10 @@ class SentenceGenerator:
         """
         print(f"Generating {num_sentences} sentences ({min_words}-{max_words} words)...")
 
-        prompt = f"""Generate {num_sentences} diverse, grammatically correct English sentences.
-Each sentence should be between {min_words} and {max_words} words long.
-The sentences should cover various topics: technology, nature, daily life, science, culture, history, etc.
-Make them interesting and varied in structure.
-
-Return ONLY the sentences, one per line, numbered from 1 to {num_sentences}.
-Format: "1. [sentence]" on each line."""
-
         try:
-            if self.provider == "gemini":
-                response = self.model.generate_content(prompt)
-                content = response.text.strip()
-            elif self.provider == "anthropic":
-                response = self.client.messages.create(
-                    model=config.TRANSLATION_MODEL,
-                    max_tokens=4000,
-                    temperature=0.7,
-                    messages=[{
-                        "role": "user",
-                        "content": prompt
-                    }]
-                )
-                content = response.content[0].text.strip()
-
-            # Parse sentences from numbered list
-            sentences = []
-            for line in content.split('\n'):
-                line = line.strip()
-                if line and any(line.startswith(f"{i}.") for i in range(1, num_sentences + 1)):
-                    # Remove the number prefix
-                    sentence = line.split('.', 1)[1].strip()
-                    # Validate word count
-                    word_count = len(sentence.split())
-                    if min_words <= word_count <= max_words:
-                        sentences.append(sentence)
-
-            # If we don't have enough sentences, generate more
-            if len(sentences) < num_sentences:
-                print(f"Warning: Only generated {len(sentences)} valid sentences. Generating more...")
-                additional_needed = num_sentences - len(sentences)
-                additional_sentences = self._generate_additional_sentences(
-                    additional_needed, min_words, max_words
-                )
-                sentences.extend(additional_sentences)
-
-            # Take exactly the number requested
-            sentences = sentences[:num_sentences]
-
+            sentences = self._run(
+                self._generate_sentences_async(num_sentences, min_words, max_words)
+            )
             print(f"Successfully generated {len(sentences)} sentences")
             return sentences
 
@@ -122,85 +125,146 @@ Format: "1. [sentence]" on each line."""
             print("Falling back to template-based generation...")
             return self._generate_template_sentences(num_sentences, min_words, max_words)
 
-    def _generate_additional_sentences(self, count: int, min_words: int, max_words: int) -> List[str]:
-        """Generate additional sentences if needed."""
-        prompt = f"""Generate {count} more diverse, grammatically correct English sentences.
-Each sentence should be between {min_words} and {max_words} words long.
-Return ONLY the sentences, one per line, without numbering."""
+    @staticmethod
+    def _run(coro):
+        """Run coro on a fresh event loop, closing that loop's API clients after."""
+        async def main():
+            try:
+                return await coro
+            finally:
+                await aclose_loop_clients()
 
         try:
-            if self.provider == "gemini":
-                # Create a new model instance with higher temperature for more diversity
-                model = genai.GenerativeModel(
-                    model_name=config.TRANSLATION_MODEL,
-                    generation_config={
-                        "temperature": 0.8,
-                        "max_output_tokens": 2000,
-                    }
-                )
-                response = model.generate_content(prompt)
-                content = response.text.strip()
-            elif self.provider == "anthropic":
-                response = self.client.messages.create(
-                    model=config.TRANSLATION_MODEL,
-                    max_tokens=2000,
-                    temperature=0.8,
-                    messages=[{
-                        "role": "user",
-                        "content": prompt
-                    }]
-                )
-                content = response.content[0].text.strip()
-
-            sentences = [s.strip() for s in content.split('\n') if s.strip()]
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(main())
+        # Already inside an event loop (e.g. Jupyter): run ours on a worker thread
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(asyncio.run, main()).result()
 
-            # Validate word count
-            valid_sentences = []
-            for sentence in sentences:
-                word_count = len(sentence.split())
-                if min_words <= word_count <= max_words:
-                    valid_sentences.append(sentence)
+    async def _generate_sentences_async(self,
+                                        num_sentences: int,
+                                        min_words: int,
+                                        max_words: int) -> List[str]:
+        """
+        Fan chunked generation requests out, merge them and top up if short.
 
-            return valid_sentences
+        Raises:
+            Exception: If every chunk request fails
+        """
+        size = config.SENTENCES_PER_REQUEST
+        chunks = [min(size, num_sentences - start) for start in range(0, num_sentences, size)]
+        outcomes = await asyncio.gather(
+            *(self._generate_chunk_async(k, min_words, max_words, topic=_TOPICS[i % len(_TOPICS)])
+              for i, k in enumerate(chunks)),
+            return_exceptions=True
+        )
 
-        except Exception as e:
-            print(f"Error generating additional sentences: {e}")
-            return []
+        errors = [o for o in outcomes if isinstance(o, BaseException)]
+        if len(errors) == len(outcomes):
+            raise errors[0]
 
-    def _generate_template_sentences(self, count: int, min_words: int, max_words: int) -> List[str]:
-        """Fallback method using templates."""
-        templates = [
-            "The {adj} {noun} {verb} across the {place} while the {weather} {verb2}.",
-            "Scientists have discovered that {noun} can {verb} in unexpected ways when exposed to {condition}.",
-            "Every morning, the {profession} would {verb} before heading to the {place} to start work.",
-            "In the distant {place}, ancient {noun} still {verb} beneath the {adj} {noun2}.",
-            "Technology has revolutionized how we {verb} and interact with {noun} in modern society.",
-            "The {adj} landscape stretched endlessly, with {noun} visible in every direction we looked.",
-            "Children often {verb} when they encounter {noun} for the first time in their lives.",
-            "Historical records suggest that {profession} used to {verb} differently than they do today.",
-            "The {weather} conditions made it difficult to {verb} safely through the {place} yesterday.",
-            "Researchers believe that understanding {noun} could help us {verb} more effectively in the future."
-        ]
-
-        words = {
-            "adj": ["beautiful", "ancient", "modern", "mysterious", "vibrant", "quiet", "massive", "tiny"],
-            "noun": ["mountain", "river", "city", "technology", "culture", "tradition", "discovery", "innovation"],
-            "verb": ["flows", "develops", "transforms", "appears", "grows", "changes", "evolves", "operates"],
-            "verb2": ["continues", "persists", "remains", "develops"],
-            "place": ["valley", "marketplace", "forest", "ocean", "countryside", "metropolis"],
-            "weather": ["sun", "wind", "rain", "storm"],
-            "condition": ["sunlight", "pressure", "temperature", "darkness"],
-            "profession": ["teacher", "doctor", "engineer", "artist", "scientist"],
-            "noun2": ["horizon", "surface", "canopy", "structure"]
-        }
+        # Merge the chunks, dropping case-insensitive duplicates
+        unique: Dict[str, str] = {}
+        for outcome in outcomes:
+            if isinstance(outcome, BaseException):
+                continue
+            for sentence in outcome:
+                unique.setdefault(sentence.lower(), sentence)
 
+        # If we don't have enough sentences, ask once more with a little more variety
+        if len(unique) < num_sentences:
+            print(f"Warning: Only generated {len(unique)} valid sentences. Generating more...")
+            try:
+                extra = await self._generate_chunk_async(num_sentences - len(unique),
+                                                         min_words, max_words,
+                                                         temperature=0.8)
+            except Exception as e:
+                print(f"Error generating additional sentences: {e}")
+                extra = []
+            for sentence in extra:
+                unique.setdefault(sentence.lower(), sentence)
+
+        if len(unique) < num_sentences:
+            print(f"Warning: Returning {len(unique)} of {num_sentences} requested sentences")
+
+        # Take exactly the number requested
+        return list(unique.values())[:num_sentences]
+
+    async def _generate_chunk_async(self,
+                                    count: int,
+                                    min_words: int,
+                                    max_words: int,
+                                    temperature: float = 0.7,
+                                    topic: str = None) -> List[str]:
+        """
+        Ask the model for one numbered list of sentences and parse it.
+
+        Args:
+            count: Number of sentences to request
+            min_words: Minimum words per sentence
+            max_words: Maximum words per sentence
+            temperature: Sampling temperature (some creativity for diversity)
+            topic: Subject area for this chunk (a mix of topics if None)
+
+        Returns:
+            Sentences from the response that pass the word-count check
+        """
+        if topic:
+            topics = f"The sentences should all relate to {topic}, each about a different aspect of it."
+        else:
+            topics = "The sentences should cover various topics: technology, nature, daily life, science, culture, history, etc."
+
+        prompt = f"""Generate {count} diverse, grammatically correct English sentences.
+Each sentence should be between {min_words} and {max_words} words long.
+{topics}
+Make them interesting and varied in structure.
+
+Return ONLY the sentences, one per line, numbered from 1 to {count}.
+Format: "1. [sentence]" on each line."""
+
+        # Small chunks need only a small output budget
+        max_tokens = count * _TOKENS_PER_SENTENCE
+
+        if self.provider == "gemini":
+            model = loop_gemini_model(self.api_key, config.TRANSLATION_MODEL, temperature)
+            response = await model.generate_content_async(
+                prompt,
+                generation_config={
+                    "temperature": temperature,
+                    "max_output_tokens": max_tokens,
+                }
+            )
+            content = response.text.strip()
+        elif self.provider == "anthropic":
+            response = await loop_anthropic_client(self.api_key).messages.create(
+                model=config.TRANSLATION_MODEL,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                messages=[{
+                    "role": "user",
+                    "content": prompt
+                }]
+            )
+            content = response.content[0].text.strip()
+
+        # Parse sentences from numbered list
         sentences = []
-        for i in range(count):
-            template = random.choice(templates)
-            sentence = template
-            for key, values in words.items():
-                if f"{{{key}}}" in sentence:
-                    sentence = sentence.replace(f"{{{key}}}", random.choice(values))
-            sentences.append(sentence)
+        for line in content.splitlines():
+            m = _NUM_LINE.match(line)
+            if not m or not 1 <= int(m.group(1)) <= count:
+                continue
+            sentence = m.group(2)
+            # Validate word count
+            word_count = sentence.count(' ') + 1
+            if min_words <= word_count <= max_words:
+                sentences.append(sentence)
 
         return sentences
+
+    def _generate_template_sentences(self, count: int, min_words: int, max_words: int) -> List[str]:
+        """Fallback method using templates."""
+        rng = random.Random()
+        choice = rng.choice
+        chooser = _LazyChoices(_TEMPLATE_WORDS, choice)
+        return [choice(_TEMPLATES).format_map(chooser) for _ in range(count)]
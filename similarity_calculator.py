@@ -3,27 +3,72 @@ Similarity Calculator Module
 Calculates cosine distance between sentence embeddings.
 """
 
+import functools
+import threading
+import weakref
 import numpy as np
+import torch
 from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
-from typing import List, Tuple
+from typing import List, MutableMapping, Optional, Tuple, Union
 import config
 
 
+_model_lock = threading.Lock()
+
+
+def _pick_device() -> str:
+    """Use the GPU when one is available."""
+    return 'cuda' if torch.cuda.is_available() else 'cpu'
+
+
+@functools.lru_cache(maxsize=4)
+def _load_st(model_name: str, device: str) -> SentenceTransformer:
+    """Load a sentence transformer once per (model, device) and reuse it.
+
+    On CUDA the weights are cast to FP16; on CPU they stay FP32.
+    """
+    model = SentenceTransformer(model_name, device=device)
+    if device == 'cuda':
+        model.half()
+    return model
+
+
+def load_model(model_name: str = None) -> SentenceTransformer:
+    """
+    Return the shared embedding model, loading it on first use.
+
+    Safe to call from a background thread to warm the model up; concurrent
+    callers wait for the same load instead of starting a second one.
+
+    Args:
+        model_name: Name of sentence transformer model (defaults to config)
+
+    Returns:
+        The loaded SentenceTransformer
+    """
+    with _model_lock:
+        return _load_st(model_name or config.EMBEDDING_MODEL, _pick_device())
+
+
 class SimilarityCalculator:
     """Calculates semantic similarity between sentences using embeddings."""
 
-    def __init__(self, model_name: str = None):
+    def __init__(self, model_name: str = None, cache: Optional[MutableMapping] = None):
         """
         Initialize similarity calculator.
 
         Args:
             model_name: Name of sentence transformer model to use
+            cache: Mapping used to memoize embeddings (defaults to in-process)
         """
         self.model_name = model_name or config.EMBEDDING_MODEL
-        print(f"Loading embedding model: {self.model_name}...")
-        self.model = SentenceTransformer(self.model_name)
+        print(f"Loading embedding model: {self.model_name} ({_pick_device()})...")
+        self.model = load_model(self.model_name)
         print("Embedding model loaded successfully")
+        self.cache = cache if cache is not None else {}
+        # Recent encode_normalized results, plus a strong ref to the last one
+        self._encoded: MutableMapping[Tuple[str, ...], torch.Tensor] = weakref.WeakValueDictionary()
+        self._last_encoded = None
 
     def calculate_cosine_distance(self,
                                   sentence1: str,
@@ -41,21 +86,7 @@ class SimilarityCalculator:
         Returns:
             Cosine distance (float)
         """
-        # Generate embeddings
-        embedding1 = self.model.encode(sentence1, convert_to_numpy=True)
-        embedding2 = self.model.encode(sentence2, convert_to_numpy=True)
-
-        # Reshape for sklearn
-        embedding1 = embedding1.reshape(1, -1)
-        embedding2 = embedding2.reshape(1, -1)
-
-        # Calculate cosine similarity
-        similarity = cosine_similarity(embedding1, embedding2)[0][0]
-
-        # Convert to cosine distance
-        distance = 1 - similarity
-
-        return float(distance)
+        return self.calculate_batch_distances([sentence1], [sentence2])[0]
 
     def calculate_batch_distances(self,
                                   sentences1: List[str],
@@ -76,39 +107,117 @@ class SimilarityCalculator:
         if len(sentences1) != len(sentences2):
             raise ValueError("Sentence lists must have the same length")
 
-        # Generate all embeddings at once (more efficient)
-        embeddings1 = self.model.encode(sentences1, convert_to_numpy=True)
-        embeddings2 = self.model.encode(sentences2, convert_to_numpy=True)
+        embeddings1, embeddings2 = self.encode_pairs(sentences1, sentences2)
+        return self.distances_from_embeddings(embeddings1, embeddings2)
 
-        # Calculate pairwise distances
-        distances = []
-        for emb1, emb2 in zip(embeddings1, embeddings2):
-            emb1 = emb1.reshape(1, -1)
-            emb2 = emb2.reshape(1, -1)
-            similarity = cosine_similarity(emb1, emb2)[0][0]
-            distance = 1 - similarity
-            distances.append(float(distance))
+    def encode_normalized(self, sentences: List[str]) -> torch.Tensor:
+        """
+        Encode sentences into unit-length embeddings on the model's device.
+
+        The most recent result is kept, and earlier ones are reused while any
+        caller still holds them, so asking again for the same list skips
+        the forward pass. Individual sentences are also memoized per
+        (model_name, sentence), so only unseen ones are encoded.
 
-        return distances
+        Args:
+            sentences: Sentences to encode
+
+        Returns:
+            Float32 tensor of shape (len(sentences), dim)
+        """
+        key = tuple(sentences)
+        embeddings = self._encoded.get(key)
+        if embeddings is None:
+            keys = [self._embedding_key(s) for s in sentences]
+            rows = [self.cache.get(k) for k in keys]
+            missing = [i for i, row in enumerate(rows) if row is None]
+            if missing:
+                fresh = self.model.encode([sentences[i] for i in missing],
+                                          batch_size=config.EMBEDDING_BATCH_SIZE,
+                                          convert_to_numpy=True,
+                                          normalize_embeddings=True,
+                                          show_progress_bar=False)
+                for i, row in zip(missing, fresh):
+                    rows[i] = self.cache[keys[i]] = row.astype(np.float32)
+            embeddings = torch.from_numpy(np.stack(rows)).float().to(self.model.device)
+            self._encoded[key] = embeddings
+        self._last_encoded = embeddings
+        return embeddings
+
+    def encode_pairs(self,
+                     sentences1: List[str],
+                     sentences2: List[str]) -> Tuple[torch.Tensor, torch.Tensor]:
+        """
+        Encode both sides of a pair list with one forward pass.
+
+        Each distinct sentence is encoded once and its row is gathered back
+        to every position it appears in.
+
+        Args:
+            sentences1: List of first sentences
+            sentences2: List of second sentences
+
+        Returns:
+            Tuple of normalized embedding tensors (one row per sentence)
+        """
+        n = len(sentences1)
+        texts = sentences1 + sentences2
+        unique = list(dict.fromkeys(texts))
+        position = {text: i for i, text in enumerate(unique)}
+        encoded = self.encode_normalized(unique)
+        inverse = torch.tensor([position[text] for text in texts], device=encoded.device)
+        embeddings = encoded[inverse]
+        return embeddings[:n], embeddings[n:]
+
+    def distances_from_embeddings(self,
+                                  embeddings1: torch.Tensor,
+                                  embeddings2: torch.Tensor) -> List[float]:
+        """
+        Row-wise cosine distances between two normalized embedding tensors.
+
+        Args:
+            embeddings1: Normalized embeddings (see encode_normalized)
+            embeddings2: Normalized embeddings with the same shape
+
+        Returns:
+            List of cosine distances
+        """
+        # For unit vectors the row-wise dot product is the cosine similarity;
+        # only the final scores leave the device
+        similarities = torch.einsum('ij,ij->i', embeddings1, embeddings2)
+        return (1.0 - similarities).cpu().numpy().astype(float).tolist()
 
     def get_embedding(self, sentence: str) -> np.ndarray:
         """
         Get embedding vector for a sentence.
 
+        Embeddings are deterministic, so they are memoized per
+        (model_name, sentence).
+
         Args:
             sentence: Input sentence
 
         Returns:
-            Numpy array of embedding vector
+            Unit-length numpy embedding vector, so a plain dot product of two
+            embeddings is their cosine similarity
         """
-        return self.model.encode(sentence, convert_to_numpy=True)
-
-    def calculate_statistics(self, distances: List[float]) -> dict:
+        key = self._embedding_key(sentence)
+        if key not in self.cache:
+            self.cache[key] = self.model.encode(sentence, convert_to_numpy=True,
+                                                normalize_embeddings=True,
+                                                show_progress_bar=False)
+        return self.cache[key]
+
+    def _embedding_key(self, sentence: str) -> str:
+        """Cache key for a sentence's normalized embedding under this model."""
+        return f"embedding:normalized|{self.model_name}|{sentence}"
+
+    def calculate_statistics(self, distances: Union[np.ndarray, List[float]]) -> dict:
         """
         Calculate statistics for a list of distances.
 
         Args:
-            distances: List of cosine distances
+            distances: Array or list of cosine distances
 
         Returns:
             Dictionary with statistics:
@@ -121,15 +230,20 @@ class SimilarityCalculator:
                 'median': float
             }
         """
-        distances_array = np.array(distances)
-
-        stats = {
-            'mean': float(np.mean(distances_array)),
-            'variance': float(np.var(distances_array)),
-            'std': float(np.std(distances_array)),
-            'min': float(np.min(distances_array)),
-            'max': float(np.max(distances_array)),
-            'median': float(np.median(distances_array))
+        # One sort yields min, max and median; mean and variance come from
+        # the sum and sum of squares instead of separate reductions
+        a = np.sort(np.asarray(distances, dtype=np.float64))
+        n = a.size
+        mean = a.sum() / n
+        variance = max(float(np.dot(a, a)) / n - mean * mean, 0.0)
+        mid = n // 2
+        median = a[mid] if n % 2 else (a[mid - 1] + a[mid]) / 2
+
+        return {
+            'mean': float(mean),
+            'variance': variance,
+            'std': variance ** 0.5,
+            'min': float(a[0]),
+            'max': float(a[-1]),
+            'median': float(median)
         }
-
-        return stats
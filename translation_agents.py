@@ -4,11 +4,256 @@ Implements three translation agents: EN→RU, RU→HE, HE→EN
 Supports both Gemini and Anthropic APIs
 """
 
-import google.generativeai as genai
-from anthropic import Anthropic
-from typing import Optional
+import os
+import re
+import time
+import asyncio
+import tempfile
+import weakref
+import functools
+from concurrent.futures import ThreadPoolExecutor
+import httpx
+import orjson
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, List, Optional
+from agent_wrapper import AgentOutputError, AgentWrapper, RateLimiter
 import config
 
+# Each provider SDK takes the better part of a second to import, so it is
+# only imported once an agent for that provider is first used
+if TYPE_CHECKING:
+    import google.generativeai as genai
+    from anthropic import Anthropic, AsyncAnthropic, DefaultHttpxClient, DefaultAsyncHttpxClient
+
+try:
+    import h2  # noqa: F401 -- enables HTTP/2 in httpx when installed
+    _HTTP2 = True
+except ImportError:
+    _HTTP2 = False
+
+# Connection pools for the Anthropic provider (one sync pool per pipeline,
+# one async pool per event loop)
+_HTTP_LIMITS = httpx.Limits(max_connections=2000,
+                            max_keepalive_connections=500,
+                            keepalive_expiry=30.0)
+_HTTP_TIMEOUT = 120.0  # seconds; a plain float works with any httpx flavour
+
+# Output tokens per source word by target language: Cyrillic and Hebrew
+# script split into more tokens than English
+_TOKENS_PER_WORD = {"Russian": 5, "Hebrew": 6}
+_DEFAULT_TOKENS_PER_WORD = 3
+
+# A translation cut off at its output cap is retried once with this much more room
+_TRUNCATION_RETRY_FACTOR = 4
+
+# A single-sentence translation never needs a blank line, so generation can
+# stop there instead of running on into commentary
+_STOP_SEQUENCES = ["\n\n"]
+
+# Gemini batch job states after which polling stops
+_GEMINI_BATCH_DONE_STATES = {
+    "JOB_STATE_SUCCEEDED",
+    "JOB_STATE_FAILED",
+    "JOB_STATE_CANCELLED",
+    "JOB_STATE_EXPIRED",
+}
+
+# Structured single-leg output (config.STRUCTURED_OUTPUT): the translation is
+# the only field, so no free-text cleanup is needed
+_TRANSLATION_SCHEMA = {
+    "type": "object",
+    "properties": {"translation": {"type": "string"}},
+    "required": ["translation"],
+}
+
+_TRANSLATION_TOOL = {
+    "name": "emit_translation",
+    "description": "Record the translation.",
+    "input_schema": _TRANSLATION_SCHEMA,
+}
+
+# Single-call EN→RU→HE→EN chain with structured JSON output
+_CHAIN_INSTRUCTION = """You are a professional translator.
+Translate the given English text to Russian, then translate that Russian text to Hebrew,
+then translate that Hebrew text back to English. Translate each step only from the
+previous step's output, preserving meaning and tone.
+Return JSON with the keys "russian", "hebrew" and "final"."""
+
+_CHAIN_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "russian": {"type": "string"},
+        "hebrew": {"type": "string"},
+        "final": {"type": "string"},
+    },
+    "required": ["russian", "hebrew", "final"],
+}
+
+_CHAIN_GENERATION_CONFIG = {
+    "temperature": config.TEMPERATURE,
+    "max_output_tokens": 1500,
+    "response_mime_type": "application/json",
+    "response_schema": _CHAIN_SCHEMA,
+}
+
+# Anthropic returns the chain as the input of a forced tool call
+_CHAIN_TOOL = {
+    "name": "record_translations",
+    "description": "Record the Russian, Hebrew and final English translations.",
+    "input_schema": _CHAIN_SCHEMA,
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _timeout_errors(provider: str) -> tuple:
+    """SDK-specific timeout errors for provider, re-raised as the built-in TimeoutError."""
+    if provider == "gemini":
+        from google.api_core.exceptions import DeadlineExceeded
+        return (DeadlineExceeded, httpx.TimeoutException, TimeoutError)
+    from anthropic import APITimeoutError
+    return (APITimeoutError, httpx.TimeoutException, TimeoutError)
+
+
+@functools.lru_cache(maxsize=None)
+def _configure_gemini(api_key: str) -> None:
+    """Configure the Gemini SDK once per process and API key."""
+    import google.generativeai as genai
+    genai.configure(api_key=api_key)
+
+
+@functools.lru_cache(maxsize=None)
+def _get_model(api_key: str,
+               model_name: str,
+               temperature: float,
+               system_instruction: Optional[str] = None) -> "genai.GenerativeModel":
+    """
+    Return a shared Gemini model for sync calls.
+
+    Models are stateless between calls, so agents with the same settings
+    and instructions reuse one instance across pipelines. Async calls use
+    loop_gemini_model() instead.
+    """
+    return _new_model(api_key, model_name, temperature, system_instruction)
+
+
+def _new_model(api_key: str,
+               model_name: str,
+               temperature: float,
+               system_instruction: Optional[str] = None) -> "genai.GenerativeModel":
+    """Build a Gemini model, configuring the SDK once per API key."""
+    import google.generativeai as genai
+    _configure_gemini(api_key)
+    return genai.GenerativeModel(
+        model_name=model_name,
+        generation_config={
+            "temperature": temperature,
+            "max_output_tokens": 500,
+        },
+        system_instruction=system_instruction
+    )
+
+
+@functools.lru_cache(maxsize=32)
+def _get_anthropic_client(api_key: str,
+                          http_client: Optional["DefaultHttpxClient"] = None) -> "Anthropic":
+    """
+    Return a shared sync Anthropic client.
+
+    Agents built with the same key and connection pool (e.g. the three
+    agents of one pipeline) get the same client instead of one each.
+    """
+    from anthropic import Anthropic
+    return Anthropic(api_key=api_key, http_client=http_client)
+
+
+class _LoopClients:
+    """Async clients created on one event loop, and how to close them."""
+
+    def __init__(self):
+        self.clients: Dict[tuple, Any] = {}
+        self.closers: List[Callable[[], Awaitable]] = []
+
+
+# Async clients keep connections bound to the event loop they were opened on,
+# so every loop gets its own; aclose_loop_clients() closes them on that loop
+_loop_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopClients]" = \
+    weakref.WeakKeyDictionary()
+
+
+def _loop_client(key: tuple,
+                 factory: Callable[[], Any],
+                 aclose: Optional[Callable[[Any], Awaitable]] = None) -> Any:
+    """Return the client for key on the running event loop, creating it there."""
+    scope = _loop_clients.setdefault(asyncio.get_running_loop(), _LoopClients())
+    client = scope.clients.get(key)
+    if client is None:
+        client = scope.clients[key] = factory()
+        if aclose is not None:
+            scope.closers.append(functools.partial(aclose, client))
+    return client
+
+
+async def aclose_loop_clients():
+    """
+    Close the async clients created on the running event loop.
+
+    Await this at the end of a coroutine handed to asyncio.run(), before
+    its loop closes; the next loop starts with fresh clients.
+    """
+    scope = _loop_clients.pop(asyncio.get_running_loop(), None)
+    if scope is None:
+        return
+    for aclose in reversed(scope.closers):
+        try:
+            await aclose()
+        except Exception as e:
+            print(f"Warning: closing async client failed: {e}")
+
+
+def loop_http_pool() -> "DefaultAsyncHttpxClient":
+    """Async connection pool for the running event loop, shared by its Anthropic clients."""
+    def make():
+        from anthropic import DefaultAsyncHttpxClient
+        # The SDK's own client class keeps its defaults and matches the
+        # httpx flavour it was built against
+        return DefaultAsyncHttpxClient(limits=_HTTP_LIMITS, timeout=_HTTP_TIMEOUT, http2=_HTTP2)
+    return _loop_client(("httpx",), make, aclose=lambda pool: pool.aclose())
+
+
+def loop_gemini_model(api_key: str,
+                      model_name: str,
+                      temperature: float,
+                      system_instruction: Optional[str] = None) -> "genai.GenerativeModel":
+    """
+    Gemini model for async calls on the running event loop.
+
+    The SDK otherwise falls back to one process-wide async gRPC client,
+    which stays bound to the loop it was created on; each loop's model
+    gets its own client instead.
+    """
+    def make_client():
+        from google.ai import generativelanguage as glm
+        from google.api_core.client_options import ClientOptions
+        return glm.GenerativeServiceAsyncClient(client_options=ClientOptions(api_key=api_key))
+
+    def make():
+        model = _new_model(api_key, model_name, temperature, system_instruction)
+        # GenerativeModel has no public way to pass its async client. It
+        # creates one lazily only while _async_client is None, which holds for
+        # google-generativeai 0.5.0-0.8.x (requirements.txt pins that range)
+        model._async_client = _loop_client(("gemini", api_key), make_client,
+                                           aclose=lambda client: client.transport.close())
+        return model
+
+    return _loop_client(("gemini", api_key, model_name, temperature, system_instruction), make)
+
+
+def loop_anthropic_client(api_key: str) -> "AsyncAnthropic":
+    """Async Anthropic client for the running event loop."""
+    def make():
+        from anthropic import AsyncAnthropic
+        return AsyncAnthropic(api_key=api_key, http_client=loop_http_pool())
+    return _loop_client(("anthropic", api_key), make)
+
 
 class TranslationAgent:
     """Base class for translation agents."""
@@ -18,7 +263,8 @@ class TranslationAgent:
                  target_lang: str,
                  api_key: str = None,
                  model: str = None,
-                 provider: str = None):
+                 provider: str = None,
+                 http_client: Optional["DefaultHttpxClient"] = None):
         """
         Initialize translation agent.
 
@@ -28,11 +274,14 @@ class TranslationAgent:
             api_key: API key for translation service
             model: Model to use for translation
             provider: API provider ("gemini" or "anthropic")
+            http_client: Shared connection pool for the sync Anthropic client
+                (async clients get a pool per event loop, see loop_http_pool)
         """
         self.source_lang = source_lang
         self.target_lang = target_lang
         self.provider = provider or config.API_PROVIDER
         self.model_name = model or config.TRANSLATION_MODEL
+        self.structured = config.STRUCTURED_OUTPUT
 
         # Get appropriate API key based on provider
         if self.provider == "gemini":
@@ -45,90 +294,269 @@ class TranslationAgent:
         if not self.api_key:
             raise ValueError(f"API key required for {self.__class__.__name__} with provider {self.provider}")
 
-        # Initialize the appropriate API client
-        if self.provider == "gemini":
-            # Configure Gemini API
-            genai.configure(api_key=self.api_key)
-            self.model = genai.GenerativeModel(
-                model_name=self.model_name,
-                generation_config={
-                    "temperature": config.TEMPERATURE,
-                    "max_output_tokens": 500,
-                }
-            )
-        elif self.provider == "anthropic":
-            # Initialize Anthropic client
-            self.client = Anthropic(api_key=self.api_key)
+        self.system_instruction = self._get_system_instruction()
+        # Anthropic gets the instructions as a cacheable system block, so the
+        # fixed prefix can be served from its prompt cache
+        self._anthropic_system = [{
+            "type": "text",
+            "text": self.system_instruction,
+            "cache_control": {"type": "ephemeral"},
+        }]
+        # Request settings shared by every call, built once; only the text
+        # and its output budget vary per request
+        if self.structured:
+            self._extra_tokens = 16  # JSON wrapper around the translation
+            self._gemini_params = {
+                "response_mime_type": "application/json",
+                "response_schema": _TRANSLATION_SCHEMA,
+            }
+            # Anthropic returns the answer as the input of a forced tool call
+            anthropic_params = {
+                "tools": [_TRANSLATION_TOOL],
+                "tool_choice": {"type": "tool", "name": _TRANSLATION_TOOL["name"]},
+            }
+        else:
+            self._extra_tokens = 0
+            self._gemini_params = {"stop_sequences": _STOP_SEQUENCES}
+            anthropic_params = {"stop_sequences": _STOP_SEQUENCES}
+        self._anthropic_params = {
+            "model": self.model_name,
+            "temperature": config.TEMPERATURE,
+            "system": self._anthropic_system,
+            **anthropic_params,
+        }
+        # Leading labels that models sometimes put before the translation
+        self._prefix_re = re.compile(
+            r'^(?:(?:Translation|Here is the translation|The translation is|'
+            rf'{re.escape(self.target_lang)}): \s*)+'
+        )
+
+        # API clients are created on first use (see the model/client properties)
+        self._model = None
+        self._client = None
+        self._http_client = http_client
 
-    def translate(self, text: str) -> str:
+    @property
+    def model(self) -> "genai.GenerativeModel":
+        """Shared Gemini model for this agent, created on first use."""
+        if self._model is None:
+            # The fixed instructions go in system_instruction so every request
+            # starts with the same prefix, which Gemini can serve from its
+            # implicit context cache.
+            self._model = _get_model(self.api_key, self.model_name,
+                                     config.TEMPERATURE, self.system_instruction)
+        return self._model
+
+    @property
+    def amodel(self) -> "genai.GenerativeModel":
+        """Gemini model for async calls on the running event loop."""
+        return loop_gemini_model(self.api_key, self.model_name,
+                                 config.TEMPERATURE, self.system_instruction)
+
+    @property
+    def client(self) -> "Anthropic":
+        """Shared sync Anthropic client, created on first use."""
+        if self._client is None:
+            # An injected HTTP client lets agents reuse warm keep-alive connections
+            self._client = _get_anthropic_client(self.api_key, self._http_client)
+        return self._client
+
+    @property
+    def aclient(self) -> "AsyncAnthropic":
+        """Async Anthropic client for the running event loop."""
+        return loop_anthropic_client(self.api_key)
+
+    def translate(self, text: str, timeout: Optional[float] = None) -> str:
         """
         Translate text from source to target language.
 
         Args:
             text: Text to translate
+            timeout: Request timeout in seconds, enforced by the provider SDK
 
         Returns:
             Translated text
 
         Raises:
+            TimeoutError: If the provider request times out
             Exception: If translation fails
         """
-        prompt = self._get_translation_prompt(text)
-
         try:
-            if self.provider == "gemini":
-                response = self.model.generate_content(prompt)
-                translation = response.text.strip()
-            elif self.provider == "anthropic":
-                response = self.client.messages.create(
-                    model=self.model_name,
-                    max_tokens=500,
-                    temperature=config.TEMPERATURE,
-                    messages=[{
-                        "role": "user",
-                        "content": prompt
-                    }]
-                )
-                translation = response.content[0].text.strip()
+            budget = self._max_tokens(text)
+            for _ in range(2):
+                if self.provider == "gemini":
+                    response = self.model.generate_content(
+                        text,
+                        generation_config=self._generation_config(text, budget),
+                        request_options=self._gemini_request_options(timeout)
+                    )
+                elif self.provider == "anthropic":
+                    response = self.client.messages.create(
+                        **self._anthropic_request(text, timeout, budget)
+                    )
+                if not self._truncated(response):
+                    return self._parse_response(response)
+                # A cut-off translation would be cached and scored as drift;
+                # ask once more with room to finish
+                budget *= _TRUNCATION_RETRY_FACTOR
+            raise AgentOutputError(f"output still truncated at {budget // _TRUNCATION_RETRY_FACTOR} tokens")
+
+        except Exception as e:
+            raise self._translation_error(e, timeout) from e
+
+    async def atranslate(self, text: str, timeout: Optional[float] = None) -> str:
+        """
+        Async variant of translate() for running many translations concurrently.
+
+        Uses the SDKs' native async clients, so many calls can be in flight
+        on one event loop; request building and cleanup are shared with
+        translate().
+
+        Args:
+            text: Text to translate
+            timeout: Request timeout in seconds, enforced by the provider SDK
 
-            # Remove any explanations or additional text
-            # Sometimes models add quotes or explanations
-            translation = self._clean_translation(translation)
+        Returns:
+            Translated text
 
-            return translation
+        Raises:
+            TimeoutError: If the provider request times out
+            Exception: If translation fails
+        """
+        try:
+            budget = self._max_tokens(text)
+            for _ in range(2):
+                if self.provider == "gemini":
+                    response = await self.amodel.generate_content_async(
+                        text,
+                        generation_config=self._generation_config(text, budget),
+                        request_options=self._gemini_request_options(timeout)
+                    )
+                elif self.provider == "anthropic":
+                    response = await self.aclient.messages.create(
+                        **self._anthropic_request(text, timeout, budget)
+                    )
+                if not self._truncated(response):
+                    return self._parse_response(response)
+                # A cut-off translation would be cached and scored as drift;
+                # ask once more with room to finish
+                budget *= _TRUNCATION_RETRY_FACTOR
+            raise AgentOutputError(f"output still truncated at {budget // _TRUNCATION_RETRY_FACTOR} tokens")
 
         except Exception as e:
-            raise Exception(f"Translation failed ({self.source_lang}→{self.target_lang}): {str(e)}")
+            raise self._translation_error(e, timeout) from e
+
+    def _max_tokens(self, text: str) -> int:
+        """
+        Output budget for translating text.
+
+        Decode time grows with the tokens generated, so the cap follows the
+        input length (a few tokens per word, more for non-Latin targets,
+        plus headroom) rather than a fixed 500. Truncated output is
+        detected and retried with more room (see _truncated).
+        """
+        per_word = _TOKENS_PER_WORD.get(self.target_lang, _DEFAULT_TOKENS_PER_WORD)
+        return len(text.split()) * per_word + 32 + self._extra_tokens
+
+    def _generation_config(self, text: str, max_tokens: Optional[int] = None) -> dict:
+        """Per-request Gemini settings, merged over the model's defaults."""
+        return {"max_output_tokens": max_tokens or self._max_tokens(text),
+                **self._gemini_params}
+
+    @staticmethod
+    def _gemini_request_options(timeout: Optional[float]) -> Optional[dict]:
+        """Per-request Gemini options (only the timeout for now)."""
+        return {"timeout": timeout} if timeout else None
+
+    def _anthropic_request(self, text: str,
+                           timeout: Optional[float],
+                           max_tokens: Optional[int] = None) -> dict:
+        """Keyword arguments for messages.create on the sync or async client."""
+        return {
+            **self._anthropic_params,
+            "max_tokens": max_tokens or self._max_tokens(text),
+            "messages": [{
+                "role": "user",
+                "content": text
+            }],
+            "timeout": timeout,
+        }
+
+    @staticmethod
+    def _gemini_text(response) -> str:
+        """
+        Text of a Gemini response's first part.
+
+        Translations come back as one part, so this skips response.text,
+        which validates the candidate and joins all of its parts.
+        """
+        candidates = response.candidates
+        if candidates and candidates[0].content.parts:
+            return candidates[0].content.parts[0].text
+        # Blocked or empty: response.text raises a ValueError naming the finish_reason
+        try:
+            return response.text
+        except ValueError as e:
+            raise AgentOutputError(str(e)) from e
 
-    def _get_translation_prompt(self, text: str) -> str:
-        """Get complete prompt for translation."""
+    def _truncated(self, response) -> bool:
+        """Whether generation stopped at the output cap instead of finishing."""
+        if self.provider == "gemini":
+            candidates = response.candidates
+            return bool(candidates) and candidates[0].finish_reason.name == "MAX_TOKENS"
+        return response.stop_reason == "max_tokens"
+
+    def _parse_response(self, response) -> str:
+        """Translation from a provider response."""
+        if self.provider == "gemini":
+            return self._parse_text(self._gemini_text(response))
+        return self._parse_message(response)
+
+    def _parse_text(self, text: str) -> str:
+        """Translation from a text response (Gemini, or Anthropic free text)."""
+        if self.structured:
+            return orjson.loads(text)["translation"].strip()
+        # Remove any explanations or additional text
+        # Sometimes models add quotes or explanations
+        return self._clean_translation(text.strip())
+
+    def _parse_message(self, message) -> str:
+        """Translation from an Anthropic message."""
+        if self.structured:
+            return self._tool_input(message)["translation"].strip()
+        return self._parse_text(message.content[0].text)
+
+    @staticmethod
+    def _tool_input(message) -> dict:
+        """Input of the first tool_use block in an Anthropic message."""
+        for block in message.content:
+            if block.type == "tool_use":
+                return block.input
+        raise AgentOutputError("response has no tool_use block")
+
+    def _translation_error(self, error: Exception, timeout: Optional[float]) -> Exception:
+        """Map an SDK error to TimeoutError or a labelled translation failure."""
+        leg = f"{self.source_lang}→{self.target_lang}"
+        if isinstance(error, _timeout_errors(self.provider)):
+            return TimeoutError(f"Translation timed out ({leg}) after {timeout}s")
+        return Exception(f"Translation failed ({leg}): {str(error)}")
+
+    def _get_system_instruction(self) -> str:
+        """Get the fixed translator instructions shared by every request."""
         return f"""You are a professional translator specializing in {self.source_lang} to {self.target_lang} translation.
 Provide accurate, natural translations that preserve the meaning and tone of the original text.
 Return ONLY the translated text without any explanations, quotes, or additional commentary.
 
-Translate the following {self.source_lang} text to {self.target_lang}:
-
-{text}"""
+Translate the following {self.source_lang} text to {self.target_lang}:"""
 
     def _clean_translation(self, translation: str) -> str:
         """Clean up translation output."""
-        # Remove surrounding quotes if present
-        if translation.startswith('"') and translation.endswith('"'):
-            translation = translation[1:-1]
-        elif translation.startswith("'") and translation.endswith("'"):
+        # Remove surrounding quotes if present (a matching pair of ' or ")
+        if len(translation) >= 2 and translation[0] == translation[-1] and translation[0] in '"\'':
             translation = translation[1:-1]
 
         # Remove common prefixes that models sometimes add
-        prefixes_to_remove = [
-            "Translation: ",
-            "Here is the translation: ",
-            "The translation is: ",
-            f"{self.target_lang}: ",
-        ]
-
-        for prefix in prefixes_to_remove:
-            if translation.startswith(prefix):
-                translation = translation[len(prefix):].strip()
+        translation = self._prefix_re.sub('', translation, count=1)
 
         return translation.strip()
 
@@ -136,44 +564,172 @@ Translate the following {self.source_lang} text to {self.target_lang}:
 class EnglishToRussianAgent(TranslationAgent):
     """Agent for translating English to Russian."""
 
-    def __init__(self, api_key: str = None, model: str = None, provider: str = None):
+    def __init__(self,
+                 api_key: str = None,
+                 model: str = None,
+                 provider: str = None,
+                 http_client: Optional["DefaultHttpxClient"] = None):
         """Initialize English to Russian translator."""
         super().__init__(
             source_lang="English",
             target_lang="Russian",
             api_key=api_key,
             model=model,
-            provider=provider
+            provider=provider,
+            http_client=http_client
         )
 
 
 class RussianToHebrewAgent(TranslationAgent):
     """Agent for translating Russian to Hebrew."""
 
-    def __init__(self, api_key: str = None, model: str = None, provider: str = None):
+    def __init__(self,
+                 api_key: str = None,
+                 model: str = None,
+                 provider: str = None,
+                 http_client: Optional["DefaultHttpxClient"] = None):
         """Initialize Russian to Hebrew translator."""
         super().__init__(
             source_lang="Russian",
             target_lang="Hebrew",
             api_key=api_key,
             model=model,
-            provider=provider
+            provider=provider,
+            http_client=http_client
         )
 
 
 class HebrewToEnglishAgent(TranslationAgent):
     """Agent for translating Hebrew to English."""
 
-    def __init__(self, api_key: str = None, model: str = None, provider: str = None):
+    def __init__(self,
+                 api_key: str = None,
+                 model: str = None,
+                 provider: str = None,
+                 http_client: Optional["DefaultHttpxClient"] = None):
         """Initialize Hebrew to English translator."""
         super().__init__(
             source_lang="Hebrew",
             target_lang="English",
             api_key=api_key,
             model=model,
-            provider=provider
+            provider=provider,
+            http_client=http_client
+        )
+
+
+class FusedTranslationAgent(TranslationAgent):
+    """Agent that runs the whole EN→RU→HE→EN chain in one structured-output call."""
+
+    def __init__(self,
+                 api_key: str = None,
+                 model: str = None,
+                 provider: str = None,
+                 http_client: Optional["DefaultHttpxClient"] = None):
+        """Initialize the single-call chain translator."""
+        super().__init__(
+            source_lang="English",
+            target_lang="Russian→Hebrew→English",
+            api_key=api_key,
+            model=model,
+            provider=provider,
+            http_client=http_client
         )
 
+    def translate(self, text: str, timeout: Optional[float] = None) -> str:
+        """
+        Request all three legs of the chain in a single call.
+
+        Args:
+            text: English text to translate
+            timeout: Request timeout in seconds, enforced by the provider SDK
+
+        Returns:
+            Raw JSON text with "russian", "hebrew" and "final" (see parse())
+
+        Raises:
+            TimeoutError: If the provider request times out
+            Exception: If translation fails
+        """
+        try:
+            if self.provider == "gemini":
+                response = self.model.generate_content(
+                    text,
+                    generation_config=_CHAIN_GENERATION_CONFIG,
+                    request_options=self._gemini_request_options(timeout)
+                )
+                return self._gemini_text(response)
+            elif self.provider == "anthropic":
+                response = self.client.messages.create(**self._anthropic_request(text, timeout))
+                return self._tool_json(response)
+
+        except Exception as e:
+            raise self._translation_error(e, timeout) from e
+
+    async def atranslate(self, text: str, timeout: Optional[float] = None) -> str:
+        """Async variant of translate()."""
+        try:
+            if self.provider == "gemini":
+                response = await self.amodel.generate_content_async(
+                    text,
+                    generation_config=_CHAIN_GENERATION_CONFIG,
+                    request_options=self._gemini_request_options(timeout)
+                )
+                return self._gemini_text(response)
+            elif self.provider == "anthropic":
+                response = await self.aclient.messages.create(**self._anthropic_request(text, timeout))
+                return self._tool_json(response)
+
+        except Exception as e:
+            raise self._translation_error(e, timeout) from e
+
+    def parse(self, raw: str, agents: List[TranslationAgent]) -> dict:
+        """
+        Validate the chain JSON and clean each leg.
+
+        Args:
+            raw: JSON text returned by translate()
+            agents: The per-leg agents, whose cleanup rules apply to each leg
+
+        Returns:
+            Dictionary with 'russian', 'hebrew' and 'final'
+
+        Raises:
+            ValueError: If the JSON is malformed or a leg is missing
+        """
+        chain = orjson.loads(raw)
+        if not isinstance(chain, dict):
+            raise ValueError("chain output is not a JSON object")
+
+        results = {}
+        for key, agent in zip(('russian', 'hebrew', 'final'), agents):
+            value = chain.get(key)
+            if not isinstance(value, str) or not value.strip():
+                raise ValueError(f"missing '{key}'")
+            results[key] = agent._clean_translation(value.strip())
+        return results
+
+    def _get_system_instruction(self) -> str:
+        """The chain instructions replace the single-leg ones."""
+        return _CHAIN_INSTRUCTION
+
+    def _anthropic_request(self, text: str,
+                           timeout: Optional[float],
+                           max_tokens: Optional[int] = None) -> dict:
+        """Force a tool call whose input schema is the chain's JSON shape."""
+        request = super()._anthropic_request(text, timeout)
+        # The JSON carries three translations and may span blank lines
+        request["max_tokens"] = 1500
+        request.pop("stop_sequences", None)
+        request["tools"] = [_CHAIN_TOOL]
+        request["tool_choice"] = {"type": "tool", "name": _CHAIN_TOOL["name"]}
+        return request
+
+    @staticmethod
+    def _tool_json(response) -> str:
+        """Serialize the forced tool call's input back to JSON text."""
+        return orjson.dumps(TranslationAgent._tool_input(response)).decode()
+
 
 class TranslationPipeline:
     """Manages the three-agent translation pipeline."""
@@ -181,7 +737,10 @@ class TranslationPipeline:
     def __init__(self,
                  api_key: str = None,
                  model: str = None,
-                 provider: str = None):
+                 provider: str = None,
+                 agent_wrapper: Optional[AgentWrapper] = None,
+                 prewarm: bool = False,
+                 fused: bool = False):
         """
         Initialize translation pipeline with all three agents.
 
@@ -189,11 +748,107 @@ class TranslationPipeline:
             api_key: API key for translation service
             model: Model to use for all agents
             provider: API provider ("gemini" or "anthropic")
+            agent_wrapper: Wrapper that retries, rate-limits and caches each
+                step (defaults to one limited to config.REQUESTS_PER_MINUTE)
+            prewarm: Open the sync connection to the provider up front so the
+                first translate call skips the TCP/TLS handshake
+            fused: Run the whole chain in one structured-output call per
+                text instead of three agent calls
         """
         self.provider = provider or config.API_PROVIDER
-        self.agent1 = EnglishToRussianAgent(api_key=api_key, model=model, provider=self.provider)
-        self.agent2 = RussianToHebrewAgent(api_key=api_key, model=model, provider=self.provider)
-        self.agent3 = HebrewToEnglishAgent(api_key=api_key, model=model, provider=self.provider)
+
+        # One sync connection pool per pipeline, shared by all three agents
+        # (Gemini talks gRPC through its own channel, so only Anthropic uses it).
+        # Async calls use a pool per event loop instead (see loop_http_pool).
+        self._http_client = None
+        if self.provider == "anthropic":
+            # The SDK's own client class keeps its defaults and matches the
+            # httpx flavour it was built against
+            from anthropic import DefaultHttpxClient
+            self._http_client = DefaultHttpxClient(limits=_HTTP_LIMITS, timeout=_HTTP_TIMEOUT,
+                                                   http2=_HTTP2)
+
+        clients = {"http_client": self._http_client}
+        self.agent1 = EnglishToRussianAgent(api_key=api_key, model=model, provider=self.provider, **clients)
+        self.agent2 = RussianToHebrewAgent(api_key=api_key, model=model, provider=self.provider, **clients)
+        self.agent3 = HebrewToEnglishAgent(api_key=api_key, model=model, provider=self.provider, **clients)
+        self.fused = fused
+        # Original texts of submitted Anthropic batches, by first-leg batch ID
+        self._pending_batches: Dict[str, List[str]] = {}
+        self.fused_agent = FusedTranslationAgent(api_key=api_key, model=model, provider=self.provider,
+                                                 **clients)
+
+        # Every step, including its retries, draws from one shared rate limiter
+        self.agent_wrapper = agent_wrapper or AgentWrapper(
+            rate_limiter=RateLimiter(
+                capacity=config.REQUESTS_PER_MINUTE,
+                refill_per_sec=config.REQUESTS_PER_MINUTE / 60
+            )
+        )
+
+        # Only the sync pool can be warmed here: sockets opened on a throwaway
+        # event loop would be unusable from the loop that later translates.
+        # Async callers should await warmup() on their own loop instead.
+        if prewarm:
+            self.warmup_sync()
+
+    def warmup_sync(self):
+        """Establish the sync client's connection to the provider."""
+        try:
+            if self.provider == "anthropic":
+                self._http_client.head(str(self.agent1.client.base_url))
+            elif self.provider == "gemini":
+                self.agent1.model.count_tokens("warmup")
+        except Exception as e:
+            print(f"Warning: connection warm-up failed: {e}")
+
+    async def warmup(self, connections: int = None):
+        """
+        Open connections to the provider on the running event loop.
+
+        Issues cheap requests concurrently (a HEAD for Anthropic, a free
+        count_tokens call for Gemini) so the shared pool holds established
+        sockets before the first translations are sent. Failures are only
+        reported; real requests will simply connect on demand.
+
+        Args:
+            connections: Number of connections to open (defaults to
+                config.MAX_CONCURRENT_SENTENCES)
+        """
+        connections = connections or config.MAX_CONCURRENT_SENTENCES
+
+        async def touch():
+            if self.provider == "anthropic":
+                await loop_http_pool().head(str(self.agent1.aclient.base_url))
+            elif self.provider == "gemini":
+                await self.agent1.amodel.count_tokens_async("warmup")
+
+        outcomes = await asyncio.gather(*(touch() for _ in range(connections)),
+                                        return_exceptions=True)
+        errors = [o for o in outcomes if isinstance(o, BaseException)]
+        if errors:
+            print(f"Warning: connection warm-up failed: {errors[0]}")
+
+    def close(self):
+        """Close the shared sync connection pool."""
+        if self._http_client is not None:
+            self._http_client.close()
+
+    async def aclose(self):
+        """
+        Close the sync pool and the async clients of the running event loop.
+
+        Async connections belong to the loop that opened them, so they are
+        closed here, on that loop, rather than from close().
+        """
+        self.close()
+        await aclose_loop_clients()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
 
     def translate_full_pipeline(self, english_text: str) -> dict:
         """
@@ -214,6 +869,12 @@ class TranslationPipeline:
         Raises:
             Exception: If any translation step fails
         """
+        if self.fused:
+            return self.translate_full_json(english_text)
+        return self._translate_legs(english_text)
+
+    def _translate_legs(self, english_text: str) -> dict:
+        """Run the chain as three agent calls."""
         results = {
             'original': english_text,
             'russian': None,
@@ -222,12 +883,365 @@ class TranslationPipeline:
         }
 
         # Step 1: English → Russian
-        results['russian'] = self.agent1.translate(english_text)
+        results['russian'] = self._step(self.agent1, english_text)
 
         # Step 2: Russian → Hebrew
-        results['hebrew'] = self.agent2.translate(results['russian'])
+        results['hebrew'] = self._step(self.agent2, results['russian'])
 
         # Step 3: Hebrew → English
-        results['final'] = self.agent3.translate(results['hebrew'])
+        results['final'] = self._step(self.agent3, results['hebrew'])
+
+        return results
+
+    async def translate_full_pipeline_async(self, english_text: str) -> dict:
+        """
+        Async variant of translate_full_pipeline().
+
+        The three steps depend on each other and run in order; concurrency
+        comes from running many sentences at once (see run_batch).
+
+        Args:
+            english_text: Original English text
+
+        Returns:
+            Dictionary with all intermediate translations (see translate_full_pipeline)
+
+        Raises:
+            Exception: If any translation step fails
+        """
+        if self.fused:
+            return await self.atranslate_full_json(english_text)
+        return await self._atranslate_legs(english_text)
+
+    async def _atranslate_legs(self, english_text: str) -> dict:
+        """Async variant of _translate_legs()."""
+        results = {
+            'original': english_text,
+            'russian': None,
+            'hebrew': None,
+            'final': None
+        }
+
+        results['russian'] = await self._astep(self.agent1, english_text)
+        results['hebrew'] = await self._astep(self.agent2, results['russian'])
+        results['final'] = await self._astep(self.agent3, results['hebrew'])
 
         return results
+
+    def _step(self, agent: TranslationAgent, text: str) -> str:
+        """Run one translation step through the agent wrapper."""
+        success, result = self.agent_wrapper.call_with_retry(agent.translate, text)
+        if not success:
+            raise Exception(result)
+        return result
+
+    async def _astep(self, agent: TranslationAgent, text: str) -> str:
+        """Async variant of _step()."""
+        success, result = await self.agent_wrapper.acall_with_retry(agent.atranslate, text)
+        if not success:
+            raise Exception(result)
+        return result
+
+    def translate_full_json(self, english_text: str) -> dict:
+        """
+        Translate EN→RU→HE→EN in a single structured-output call.
+
+        One request replaces three sequential round trips: Gemini returns
+        JSON against a response schema, Anthropic fills a forced tool call.
+        The call goes through the agent wrapper (retries, rate limit,
+        cache). If the output does not match the schema, the three-agent
+        path is used instead.
+
+        Args:
+            english_text: Original English text
+
+        Returns:
+            Dictionary with all intermediate translations (see translate_full_pipeline)
+
+        Raises:
+            Exception: If the translation fails
+        """
+        raw = self._step(self.fused_agent, english_text)
+        try:
+            return {'original': english_text, **self._parse_chain(raw)}
+        except ValueError:
+            # orjson.JSONDecodeError is a ValueError too; don't serve the bad output again
+            self.agent_wrapper.forget(self.fused_agent.translate, english_text)
+            return self._translate_legs(english_text)
+
+    async def atranslate_full_json(self, english_text: str) -> dict:
+        """Async variant of translate_full_json()."""
+        raw = await self._astep(self.fused_agent, english_text)
+        try:
+            return {'original': english_text, **self._parse_chain(raw)}
+        except ValueError:
+            self.agent_wrapper.forget(self.fused_agent.atranslate, english_text)
+            return await self._atranslate_legs(english_text)
+
+    def _parse_chain(self, raw: str) -> dict:
+        """Validate fused output, cleaning each leg with its own agent's rules."""
+        return self.fused_agent.parse(raw, [self.agent1, self.agent2, self.agent3])
+
+    def run_batch(self, sentences: List[str], concurrency: int = None) -> List[dict]:
+        """
+        Translate many sentences concurrently through EN→RU→HE→EN.
+
+        Args:
+            sentences: English sentences to translate
+            concurrency: Maximum sentences in flight (defaults to config.MAX_CONCURRENT_SENTENCES)
+
+        Returns:
+            List of result dictionaries in input order (see translate_full_pipeline)
+
+        Raises:
+            Exception: If any translation step fails
+
+        When config.USE_BATCH_MODE is set, the work is submitted as offline
+        provider batch jobs instead (Gemini Batch Mode or Anthropic Message
+        Batches; half price, may take up to 24h).
+        """
+        # Translate each distinct sentence once and expand back to input order
+        unique = list(dict.fromkeys(sentences))
+
+        if config.USE_BATCH_MODE and self.provider == "gemini":
+            translated = self._run_gemini_batch(unique)
+        elif config.USE_BATCH_MODE and self.provider == "anthropic":
+            translated = self.await_batch(self.submit_batch(unique))
+        else:
+            translated = asyncio.run(self._atranslate_and_release(unique, concurrency))
+
+        by_text = dict(zip(unique, translated))
+        return [dict(by_text[s]) for s in sentences]
+
+    def translate_batch(self, texts: List[str], max_workers: int = None) -> List[dict]:
+        """
+        Translate many texts with blocking calls spread over a thread pool.
+
+        For sync callers that cannot use run_batch() (e.g. code already
+        inside a running event loop). The three steps of one text still run
+        in order, but up to max_workers texts overlap their network waits,
+        since the SDKs release the GIL on I/O.
+
+        Args:
+            texts: English texts to translate
+            max_workers: Maximum texts in flight (defaults to config.MAX_CONCURRENT_SENTENCES)
+
+        Returns:
+            List of result dictionaries in input order (see translate_full_pipeline)
+
+        Raises:
+            Exception: If any translation step fails
+        """
+        with ThreadPoolExecutor(max_workers=max_workers or config.MAX_CONCURRENT_SENTENCES) as ex:
+            return list(ex.map(self.translate_full_pipeline, texts))
+
+    async def _atranslate_and_release(self, texts: List[str], max_concurrency: int = None) -> List[dict]:
+        """atranslate_many(), then close this loop's async clients before it ends."""
+        try:
+            return await self.atranslate_many(texts, max_concurrency)
+        finally:
+            await aclose_loop_clients()
+
+    async def atranslate_many(self, texts: List[str], max_concurrency: int = None) -> List[dict]:
+        """
+        Translate many texts through EN→RU→HE→EN concurrently.
+
+        Each text runs its three steps in order; up to max_concurrency texts
+        are in flight at once, overlapping their network latency. Use this
+        from code that already runs an event loop; run_batch() is the
+        blocking entry point.
+
+        Args:
+            texts: English texts to translate
+            max_concurrency: Maximum texts in flight (defaults to config.MAX_CONCURRENT_SENTENCES)
+
+        Returns:
+            List of result dictionaries in input order (see translate_full_pipeline)
+
+        Raises:
+            Exception: If any translation step fails
+        """
+        semaphore = asyncio.Semaphore(max_concurrency or config.MAX_CONCURRENT_SENTENCES)
+
+        async def worker(text: str) -> dict:
+            async with semaphore:
+                return await self.translate_full_pipeline_async(text)
+
+        return await asyncio.gather(*(worker(t) for t in texts))
+
+    def submit_batch(self, texts: List[str]) -> str:
+        """
+        Submit the EN→RU leg for many texts as an Anthropic Message Batch.
+
+        The later legs are chained by await_batch() once each stage ends.
+
+        Args:
+            texts: English texts to translate
+
+        Returns:
+            Batch ID to pass to await_batch()
+
+        Raises:
+            ValueError: If the provider is not Anthropic
+        """
+        if self.provider != "anthropic":
+            raise ValueError(f"Message Batches require the anthropic provider, not {self.provider}")
+
+        batch_id = self._submit_anthropic_leg(self.agent1, texts)
+        self._pending_batches[batch_id] = list(texts)
+        return batch_id
+
+    def await_batch(self, batch_id: str) -> List[dict]:
+        """
+        Wait for a submitted batch and run the RU→HE and HE→EN legs after it.
+
+        Args:
+            batch_id: ID returned by submit_batch()
+
+        Returns:
+            List of result dictionaries in submission order (see translate_full_pipeline)
+
+        Raises:
+            KeyError: If the batch was not submitted by this pipeline
+            Exception: If any request in a leg did not succeed
+        """
+        texts = self._pending_batches.pop(batch_id)
+        results = [
+            {'original': t, 'russian': None, 'hebrew': None, 'final': None}
+            for t in texts
+        ]
+
+        # Each leg consumes the previous leg's output, keyed by custom_id
+        legs = ((self.agent1, 'russian'), (self.agent2, 'hebrew'), (self.agent3, 'final'))
+        for n, (agent, field) in enumerate(legs):
+            if n:
+                batch_id = self._submit_anthropic_leg(agent, outputs)
+            outputs = self._collect_anthropic_leg(agent, batch_id, len(texts))
+            for result, text in zip(results, outputs):
+                result[field] = text
+
+        return results
+
+    def _submit_anthropic_leg(self, agent: TranslationAgent, texts: List[str]) -> str:
+        """Create one Message Batch for a translation leg and return its ID."""
+        requests = []
+        for i, text in enumerate(texts):
+            params = agent._anthropic_request(text, None)
+            del params["timeout"]
+            requests.append({"custom_id": f"s{i}", "params": params})
+
+        batch = agent.client.messages.batches.create(requests=requests)
+        print(f"Submitted Anthropic message batch {batch.id} "
+              f"({agent.source_lang}→{agent.target_lang}, {len(texts)} requests)")
+        return batch.id
+
+    def _collect_anthropic_leg(self, agent: TranslationAgent, batch_id: str, count: int) -> List[str]:
+        """Poll a Message Batch until it ends and return cleaned outputs in order."""
+        leg = f"{agent.source_lang}→{agent.target_lang}"
+
+        while agent.client.messages.batches.retrieve(batch_id).processing_status != "ended":
+            time.sleep(config.BATCH_POLL_INTERVAL)
+
+        # Results may come back in any order; rejoin them by custom_id
+        translations = {}
+        for entry in agent.client.messages.batches.results(batch_id):
+            if entry.result.type != "succeeded":
+                raise Exception(f"Anthropic batch request {entry.custom_id} ({leg}) {entry.result.type}")
+            message = entry.result.message
+            if message.stop_reason == "max_tokens":
+                raise Exception(f"Anthropic batch request {entry.custom_id} ({leg}) was truncated")
+            translations[entry.custom_id] = agent._parse_message(message)
+
+        return [translations[f"s{i}"] for i in range(count)]
+
+    def _run_gemini_batch(self, sentences: List[str]) -> List[dict]:
+        """Translate via Gemini Batch Mode, one job per language leg."""
+        # Batch Mode is only exposed by the newer google-genai SDK
+        from google import genai as genai_batch
+
+        client = genai_batch.Client(api_key=self.agent1.api_key)
+        results = [
+            {'original': s, 'russian': None, 'hebrew': None, 'final': None}
+            for s in sentences
+        ]
+
+        # Each leg consumes the previous leg's output, so jobs run one after another
+        texts = list(sentences)
+        for agent, field in ((self.agent1, 'russian'),
+                             (self.agent2, 'hebrew'),
+                             (self.agent3, 'final')):
+            texts = self._run_gemini_batch_leg(client, agent, texts)
+            for result, text in zip(results, texts):
+                result[field] = text
+
+        return results
+
+    def _run_gemini_batch_leg(self, client, agent: TranslationAgent, texts: List[str]) -> List[str]:
+        """
+        Submit one translation leg as a Gemini batch job and wait for it.
+
+        Returns:
+            Cleaned translations in the same order as texts
+
+        Raises:
+            Exception: If the job does not succeed or a request in it failed
+        """
+        leg = f"{agent.source_lang}→{agent.target_lang}"
+
+        # Every request shares the same instruction; build it once
+        system_instruction = {"parts": [{"text": agent.system_instruction}]}
+
+        with tempfile.NamedTemporaryFile("wb", suffix=".jsonl", delete=False) as f:
+            f.writelines(
+                orjson.dumps({
+                    "key": f"s{i}",
+                    "request": {
+                        "system_instruction": system_instruction,
+                        "contents": [{"parts": [{"text": text}]}],
+                        "generation_config": {"temperature": config.TEMPERATURE,
+                                              **agent._generation_config(text)},
+                    },
+                }, option=orjson.OPT_APPEND_NEWLINE)
+                for i, text in enumerate(texts)
+            )
+            path = f.name
+
+        try:
+            uploaded = client.files.upload(
+                file=path,
+                config={"mime_type": "jsonl", "display_name": f"translation-{leg}"}
+            )
+        finally:
+            os.remove(path)
+
+        job = client.batches.create(
+            model=agent.model_name,
+            src=uploaded.name,
+            config={"display_name": f"translation-{leg}"}
+        )
+        print(f"Submitted Gemini batch job {job.name} ({leg}, {len(texts)} requests)")
+
+        while job.state.name not in _GEMINI_BATCH_DONE_STATES:
+            time.sleep(config.BATCH_POLL_INTERVAL)
+            job = client.batches.get(name=job.name)
+
+        if job.state.name != "JOB_STATE_SUCCEEDED":
+            raise Exception(f"Gemini batch job {job.name} ({leg}) ended in {job.state.name}")
+
+        content = client.files.download(file=job.dest.file_name)
+
+        # Output lines may come back in any order; rejoin them by key
+        translations = {}
+        for line in content.splitlines():
+            if not line.strip():
+                continue
+            record = orjson.loads(line)
+            if "error" in record:
+                raise Exception(f"Gemini batch request {record['key']} ({leg}) failed: {record['error']}")
+            candidate = record["response"]["candidates"][0]
+            if candidate.get("finishReason") == "MAX_TOKENS":
+                raise Exception(f"Gemini batch request {record['key']} ({leg}) was truncated")
+            text = candidate["content"]["parts"][0]["text"]
+            translations[record["key"]] = agent._parse_text(text)
+
+        return [translations[f"s{i}"] for i in range(len(texts))]